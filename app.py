@@ -1,45 +1,156 @@
 import os
 import sys
+import logging
+import time
+from pathlib import Path
 from datetime import datetime, date, timedelta
-from flask import Flask, render_template, redirect, url_for, flash, request, get_flashed_messages, session, jsonify
+from flask import Flask, render_template, stream_template, redirect, url_for as flask_url_for, flash, request, get_flashed_messages, session, jsonify, g, current_app, has_request_context
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
+from flask_caching import Cache
+from flask_compress import Compress
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from werkzeug.security import check_password_hash, generate_password_hash
+from sqlalchemy import event, select, func, exists, update, text, bindparam, literal, union_all
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, configure_mappers, joinedload
+from werkzeug.security import check_password_hash, safe_join
+import bcrypt
+import gzip
+import hashlib
+import mimetypes
+import sqlite3
+import click
 import json
+import orjson
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # ===== FUNÇÕES DE SAUDAÇÃO =====
+_NOITE = ("Boa noite! 🌙", "🌙")
+_MANHA = ("Bom dia! 🌅", "🌅")
+_TARDE = ("Boa tarde! ☀️", "☀️")
+
+# (saudação, emoji) indexado pela hora do dia: manhã 5h-11h, tarde 12h-17h, noite no restante
+SAUDACOES_POR_HORA = (_NOITE,) * 5 + (_MANHA,) * 7 + (_TARDE,) * 6 + (_NOITE,) * 6
+
+def obter_periodo_dia():
+    """Retorna (saudação, emoji) do horário atual com uma única leitura do relógio"""
+    return SAUDACOES_POR_HORA[datetime.now().hour]
+
 def obter_saudacao():
     """Retorna a saudação apropriada baseada no horário atual"""
-    agora = datetime.now()
-    hora = agora.hour
-    
-    if 5 <= hora < 12:
-        return "Bom dia! 🌅"
-    elif 12 <= hora < 18:
-        return "Boa tarde! ☀️"
-    else:
-        return "Boa noite! 🌙"
+    return obter_periodo_dia()[0]
 
 def obter_emoji_horario():
     """Retorna o emoji apropriado para o horário"""
-    agora = datetime.now()
-    hora = agora.hour
+    return obter_periodo_dia()[1]
+
+
+from functools import wraps, lru_cache
+
+# ===== CACHE DE URLS =====
+@lru_cache(maxsize=128)
+def _url_endpoint(endpoint):
+    return flask_url_for(endpoint)
+
+@lru_cache(maxsize=256)
+def _url_estatico_versionado(filename, caminho, mtime):
+    """URL com ?v=<hash curto do conteúdo>, calculada uma vez por versão (mtime) do arquivo"""
+    with open(caminho, 'rb') as arquivo:
+        versao = hashlib.md5(arquivo.read()).hexdigest()[:10]
+    return flask_url_for('static', filename=filename, v=versao)
+
+def _url_estatico(filename):
+    """URL do arquivo estático; o stat a cada chamada faz a versão mudar assim que o arquivo muda"""
+    caminho = safe_join(current_app.static_folder, filename)
+    try:
+        mtime = os.stat(caminho).st_mtime_ns
+    except (OSError, TypeError):
+        return flask_url_for('static', filename=filename)
+    return _url_estatico_versionado(filename, caminho, mtime)
+
+def url_for(endpoint, **values):
+    """url_for com cache só para URLs fixas: endpoint sem argumentos e arquivos estáticos dos templates"""
+    if not values:
+        # Caso mais comum (links de menu, breadcrumbs, redirects): só o nome do endpoint
+        return _url_endpoint(endpoint)
+    if endpoint == 'static' and values.keys() == {'filename'}:
+        return _url_estatico(values['filename'])
+    # Argumentos (ids, filtros, dados do formulário) vêm da requisição: sem cache, para não reter valores arbitrários
+    return flask_url_for(endpoint, **values)
+
+# ===== ESTÁTICOS PRÉ-COMPRIMIDOS =====
+EXTENSOES_PRE_COMPRIMIDAS = ('.css', '.js', '.json')
+
+@lru_cache(maxsize=256)
+def _estatico_comprimido(caminho, mtime, algoritmo):
+    """Conteúdo do arquivo comprimido no nível máximo, uma vez por versão (mtime) do arquivo"""
+    with open(caminho, 'rb') as arquivo:
+        dados = arquivo.read()
+    if algoritmo == 'br':
+        return brotli.compress(dados, quality=11)
+    return gzip.compress(dados, compresslevel=9, mtime=0)
+
+def resposta_estatico_comprimido(static_folder, filename):
+    """Resposta já comprimida para CSS/JS/JSON (None: segue pelo send_file normal do Flask)"""
+    if not filename.endswith(EXTENSOES_PRE_COMPRIMIDAS):
+        return None
+    caminho = safe_join(static_folder, filename)
+    if caminho is None or not os.path.isfile(caminho):
+        return None
+    algoritmo = request.accept_encodings.best_match(['br', 'gzip'] if brotli else ['gzip'])
+    if algoritmo is None:
+        return None
     
-    if 5 <= hora < 12:
-        return "🌅"
-    elif 12 <= hora < 18:
-        return "☀️"
-    else:
-        return "🌙"
+    estado = os.stat(caminho)
+    corpo = _estatico_comprimido(caminho, estado.st_mtime_ns, algoritmo)
+    resposta = current_app.response_class(corpo, mimetype=mimetypes.guess_type(filename)[0])
+    # Content-Encoding já definido: o Flask-Compress deixa a resposta como está
+    resposta.headers['Content-Encoding'] = algoritmo
+    resposta.vary.add('Accept-Encoding')
+    resposta.set_etag(f"{estado.st_mtime_ns:x}-{estado.st_size:x}-{algoritmo}")
+    resposta.last_modified = estado.st_mtime
+    resposta.cache_control.public = True
+    resposta.cache_control.max_age = current_app.get_send_file_max_age(filename)
+    return resposta.make_conditional(request)
 
+# ===== PERMISSÕES =====
+PERFIS_GERENCIAR_FINANCAS = frozenset({'contador', 'administrador'})
+PERFIS_VER_FINANCAS = frozenset({'contador', 'supervisor', 'administrador'})
+PERFIS_GERAR_FATURAS = frozenset({'contador', 'administrador'})
 
-from functools import wraps
+_SEM_PERMISSOES = {'gerenciar_financas': False, 'ver_financas': False, 'administrador': False}
+
+@lru_cache(maxsize=16)
+def _permissoes_do_perfil(tipo_usuario):
+    """Tabela de permissões por perfil (são poucos perfis: cada um é calculado uma vez por processo)"""
+    return {
+        'gerenciar_financas': tipo_usuario in PERFIS_GERENCIAR_FINANCAS,
+        'ver_financas': tipo_usuario in PERFIS_VER_FINANCAS,
+        'administrador': tipo_usuario == 'administrador',
+    }
+
+def permissoes_usuario():
+    """Permissões do usuário logado, calculadas uma vez por requisição (decoradores e menu do layout)"""
+    if 'permissoes' not in g:
+        usuario = current_user._get_current_object()
+        g.permissoes = _permissoes_do_perfil(usuario.tipo_usuario) if usuario.is_authenticated else _SEM_PERMISSOES
+    return g.permissoes
 
 # 🆕 DECORADORES DE PERMISSÃO FINANCEIRA
 def contador_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not current_user.is_authenticated or not current_user.can_manage_finances():
+        if not permissoes_usuario()['gerenciar_financas']:
             flash('Acesso negado! Apenas contadores e administradores podem acessar esta página.', 'error')
             return redirect(url_for('dashboard'))
         return f(*args, **kwargs)
@@ -48,23 +159,123 @@ def contador_required(f):
 def finance_view_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not current_user.is_authenticated or not current_user.can_view_finances():
+        if not permissoes_usuario()['ver_financas']:
             flash('Acesso negado! Permissão insuficiente para visualizar dados financeiros.', 'error')
             return redirect(url_for('dashboard'))
         return f(*args, **kwargs)
     return decorated_function
 
 
+# Custo do bcrypt (cada +1 dobra o tempo de verificação no login)
+BCRYPT_ROUNDS = 12
+
+def gerar_hash_senha(senha):
+    """Hash bcrypt da senha no custo BCRYPT_ROUNDS (operação cara: chamar só quando o hash será gravado)"""
+    return bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')
+
+# Hash descartável: usuário inexistente também paga uma verificação bcrypt (tempo de resposta não revela o username).
+# Literal com o mesmo custo de BCRYPT_ROUNDS (de uma senha aleatória descartada): nada é calculado no import
+_DUMMY_HASH = b'$2b$12$BKxQMdh1.rtEzNeP/LDwTeHd0C9Yv4olEaFdPzaV5QBDOqtiKws3S'
+# Custo diferente deixaria o login de usuário inexistente mensuravelmente mais rápido (ou lento) que o real
+if int(_DUMMY_HASH.split(b'$')[2]) != BCRYPT_ROUNDS:
+    raise RuntimeError("_DUMMY_HASH precisa ser regerado com o custo de BCRYPT_ROUNDS")
+
+# Mesmo logger do app.logger (o Flask usa o nome do módulo); mensagens formatadas só se o nível estiver ativo
+logger = logging.getLogger(__name__)
+
 # Inicializar extensões
 db = SQLAlchemy()
 login_manager = LoginManager()
+cache = Cache()
+compress = Compress()
+limiter = Limiter(key_func=get_remote_address, default_limits=[])
+
+# ===== JSON =====
+class OrjsonProvider(DefaultJSONProvider):
+    """jsonify/request.json via orjson (encoder em C); tipos extras continuam pelo default do Flask"""
+    
+    def _opcoes(self, indentar=False):
+        opcoes = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            opcoes |= orjson.OPT_SORT_KEYS
+        if indentar:
+            opcoes |= orjson.OPT_INDENT_2
+        return opcoes
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._opcoes('indent' in kwargs)).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Bytes direto para a resposta, sem passar por str
+        obj = self._prepare_response_obj(args, kwargs)
+        indentar = (self.compact is None and self._app.debug) or self.compact is False
+        corpo = orjson.dumps(obj, default=self.default, option=self._opcoes(indentar) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(corpo, mimetype=self.mimetype)
+
+# ===== LOG DE CONSULTAS LENTAS =====
+LIMITE_CONSULTA_LENTA = 0.1  # segundos
+
+# ===== CONSULTAS POR REQUISIÇÃO =====
+# Limite padrão em debug/testes quando SQL_LIMITE_CONSULTAS não é definido (em produção o padrão é sem limite)
+LIMITE_CONSULTAS_DEBUG = 20
+
+def limite_consultas_requisicao():
+    """Máximo de comandos SQL por requisição (0 = sem verificação)"""
+    limite = current_app.config.get('SQL_LIMITE_CONSULTAS')
+    if limite is None:
+        return LIMITE_CONSULTAS_DEBUG if current_app.debug or current_app.testing else 0
+    return limite
+
+def _contar_consulta_requisicao():
+    """Conta o comando na requisição atual, inclusive no corpo de respostas em streaming (o g continua ativo)"""
+    g.consultas_sql = consultas = g.get('consultas_sql', 0) + 1
+    limite = limite_consultas_requisicao()
+    if not limite or consultas <= limite:
+        return
+    mensagem = f"{request.method} {request.path} executou {consultas} consultas SQL (limite {limite}): provável N+1"
+    if current_app.debug or current_app.testing:
+        # Falha antes de o comando rodar; a marca no g pega o erro mesmo que a view o engula num except
+        g.consultas_excedidas = mensagem
+        raise RuntimeError(mensagem)
+    if consultas == limite + 1:
+        logger.warning("🔁 %s", mensagem)
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _marcar_inicio_consulta(conn, cursor, statement, parameters, context, executemany):
+    # Contagem por requisição (SQL_LIMITE_CONSULTAS): denuncia N+1 reintroduzido por lazy load
+    if has_request_context():
+        _contar_consulta_requisicao()
+    conn.info.setdefault('inicio_consulta', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _registrar_consulta_lenta(conn, cursor, statement, parameters, context, executemany):
+    duracao = time.perf_counter() - conn.info['inicio_consulta'].pop()
+    if duracao > LIMITE_CONSULTA_LENTA:
+        logger.warning("🐢 Consulta lenta (%.0f ms): %s", duracao * 1000, statement)
+
+# ===== PRAGMAS DO SQLITE =====
+@event.listens_for(Engine, 'connect')
+def _configurar_sqlite(dbapi_connection, connection_record):
+    """WAL permite leituras durante a escrita; busy_timeout espera o lock em vez de falhar"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA busy_timeout=5000')
+    cursor.execute('PRAGMA cache_size=-20000')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.close()
 
 # ===== MODELOS DE BANCO DE DADOS =====
 class Usuario(db.Model):
     __tablename__ = 'usuarios'
     
     id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(80), unique=True, nullable=False)
+    username = db.Column(db.String(80), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(255), nullable=False)
     nome_completo = db.Column(db.String(120), nullable=False)
     email = db.Column(db.String(120))
@@ -80,13 +291,36 @@ class Usuario(db.Model):
         try:
             if not self.password_hash:
                 return False
-            return check_password_hash(self.password_hash, password)
+            if self.password_hash.startswith('$2'):
+                valida = bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+            else:
+                # Hash legado do Werkzeug (pbkdf2/scrypt)
+                valida = check_password_hash(self.password_hash, password)
         except Exception as e:
-            print(f"Erro ao verificar senha: {e}")
+            logger.error("Erro ao verificar senha: %s", e)
             return False
+        
+        # Senha correta com hash legado ou custo desatualizado: regrava no formato atual
+        # (falha ao gravar, ex. "database is locked", não impede o login: tenta de novo no próximo)
+        if valida and self.hash_precisa_atualizar():
+            try:
+                self.set_password(password)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error("Erro ao atualizar hash da senha de %s: %s", self.username, e)
+        return valida
+    
+    def hash_precisa_atualizar(self):
+        """Indica se o hash não é bcrypt ou foi gerado com custo diferente de BCRYPT_ROUNDS"""
+        if not self.password_hash.startswith('$2'):
+            return True
+        return int(self.password_hash.split('$')[2]) != BCRYPT_ROUNDS
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = gerar_hash_senha(password)
+        if self.id is not None:
+            invalidar_senha_verificada(self.id)
     
     @property
     def is_authenticated(self):
@@ -109,15 +343,15 @@ class Usuario(db.Model):
 
     def can_manage_finances(self):
         """Quem pode gerenciar finanças: contador e administrador"""
-        return self.tipo_usuario in ['contador', 'administrador']
+        return self.tipo_usuario in PERFIS_GERENCIAR_FINANCAS
 
     def can_view_finances(self):
         """Quem pode visualizar relatórios financeiros: contador, supervisor e administrador"""
-        return self.tipo_usuario in ['contador', 'supervisor', 'administrador']
+        return self.tipo_usuario in PERFIS_VER_FINANCAS
 
     def can_generate_invoices(self):
         """Quem pode gerar faturas: apenas contador e administrador"""
-        return self.tipo_usuario in ['contador', 'administrador']
+        return self.tipo_usuario in PERFIS_GERAR_FATURAS
 
 class Paciente(db.Model):
     __tablename__ = 'pacientes'
@@ -131,7 +365,7 @@ class Paciente(db.Model):
     cep = db.Column(db.String(9))
     cartao_sus = db.Column(db.String(20))
     observacoes = db.Column(db.Text)
-    ativo = db.Column(db.Boolean, nullable=False, default=True)
+    ativo = db.Column(db.Boolean, nullable=False, default=True, index=True)
     data_cadastro = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     
     # Relacionamentos
@@ -150,7 +384,7 @@ class Veiculo(db.Model):
     capacidade = db.Column(db.Integer)
     adaptado = db.Column(db.Boolean, nullable=False, default=False)
     observacoes = db.Column(db.Text)
-    ativo = db.Column(db.Boolean, nullable=False, default=True)
+    ativo = db.Column(db.Boolean, nullable=False, default=True, index=True)
     data_cadastro = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     
     # 🆕 CAMPOS DE CONTROLE FINANCEIRO
@@ -164,7 +398,7 @@ class Veiculo(db.Model):
     
     # Relacionamentos
     agendamentos = db.relationship('Agendamento', backref='veiculo', lazy=True)
-    usos = db.relationship('UsoVeiculo', backref='veiculo', lazy=True)
+    usos = db.relationship('UsoVeiculo', back_populates='veiculo', lazy=True)
 
 class Motorista(db.Model):
     __tablename__ = 'motoristas'
@@ -178,7 +412,7 @@ class Motorista(db.Model):
     categoria_cnh = db.Column(db.String(2), nullable=False)
     vencimento_cnh = db.Column(db.Date, nullable=False)
     endereco = db.Column(db.Text)
-    status = db.Column(db.String(20), nullable=False, default='ativo')
+    status = db.Column(db.String(20), nullable=False, default='ativo', index=True)
     observacoes = db.Column(db.Text)
     data_cadastro = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     
@@ -187,18 +421,21 @@ class Motorista(db.Model):
 
 class Agendamento(db.Model):
     __tablename__ = 'agendamentos'
+    # Cobre o filtro por data com ordenação por hora (dashboard e agenda do dia)
+    __table_args__ = (db.Index('ix_agendamentos_data_hora', 'data', 'hora'),)
     
     id = db.Column(db.Integer, primary_key=True)
-    paciente_id = db.Column(db.Integer, db.ForeignKey('pacientes.id'), nullable=False)
-    veiculo_id = db.Column(db.Integer, db.ForeignKey('veiculos.id'))
-    motorista_id = db.Column(db.Integer, db.ForeignKey('motoristas.id'))
+    # Chaves estrangeiras indexadas (o SQLite não cria índice para FK): contagens por paciente/veículo/motorista
+    paciente_id = db.Column(db.Integer, db.ForeignKey('pacientes.id'), nullable=False, index=True)
+    veiculo_id = db.Column(db.Integer, db.ForeignKey('veiculos.id'), index=True)
+    motorista_id = db.Column(db.Integer, db.ForeignKey('motoristas.id'), index=True)
     tipo_transporte = db.Column(db.String(30), nullable=False)
     data = db.Column(db.Date, nullable=False)
     hora = db.Column(db.Time, nullable=False)
     origem = db.Column(db.Text, nullable=False)
     destino = db.Column(db.Text, nullable=False)
     observacoes = db.Column(db.Text)
-    status = db.Column(db.String(20), nullable=False, default='agendado')
+    status = db.Column(db.String(20), nullable=False, default='agendado', index=True)
     data_cadastro = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
 
@@ -206,9 +443,15 @@ class Agendamento(db.Model):
 
 class UsoVeiculo(db.Model):
     __tablename__ = 'uso_veiculos'
+    __table_args__ = (
+        # Usos do veículo por status no período (fatura) e "veículo já em uso?" (iniciar uso)
+        db.Index('ix_uso_veiculos_veiculo_status_data', 'veiculo_id', 'status', 'data_uso'),
+        # Listagem: em andamento / concluídos recentes ordenados por data
+        db.Index('ix_uso_veiculos_status_data', 'status', 'data_uso'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    agendamento_id = db.Column(db.Integer, db.ForeignKey('agendamentos.id'), nullable=False)
+    agendamento_id = db.Column(db.Integer, db.ForeignKey('agendamentos.id'), nullable=False, index=True)
     veiculo_id = db.Column(db.Integer, db.ForeignKey('veiculos.id'), nullable=False)
     motorista_id = db.Column(db.Integer, db.ForeignKey('motoristas.id'), nullable=False)
     
@@ -235,9 +478,11 @@ class UsoVeiculo(db.Model):
     observacoes = db.Column(db.Text)
     data_cadastro = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     
-    # Relacionamentos
-    agendamento = db.relationship('Agendamento', backref='uso_veiculo')
-    motorista = db.relationship('Motorista', backref='usos_motorista')
+    # Relacionamentos: veículo, motorista e agendamento são lidos sempre que um uso é exibido
+    # (fatura, listagem, finalização); selectin carrega os de todas as linhas num SELECT ... IN por relação
+    veiculo = db.relationship('Veiculo', back_populates='usos', lazy='selectin')
+    agendamento = db.relationship('Agendamento', backref='uso_veiculo', lazy='selectin')
+    motorista = db.relationship('Motorista', backref='usos_motorista', lazy='selectin')
     
     
     
@@ -284,6 +529,8 @@ class UsoVeiculo(db.Model):
 
 class FaturaTerceirizado(db.Model):
     __tablename__ = 'faturas_terceirizados'
+    # Verificação de fatura existente para o veículo no mês/ano
+    __table_args__ = (db.Index('ix_faturas_veiculo_referencia', 'veiculo_id', 'ano_referencia', 'mes_referencia'),)
     
     id = db.Column(db.Integer, primary_key=True)
     veiculo_id = db.Column(db.Integer, db.ForeignKey('veiculos.id'), nullable=False)
@@ -335,25 +582,300 @@ class FaturaTerceirizado(db.Model):
             UsoVeiculo.status == 'concluido'
         ).order_by(UsoVeiculo.data_uso).all()
 
+class EstatisticaTabela(db.Model):
+    __tablename__ = 'estatisticas_tabelas'
+    
+    tabela = db.Column(db.String(50), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+# ===== CONTADORES DE REGISTROS =====
+# Totais do dashboard mantidos por eventos do ORM (leitura por chave primária em vez de COUNT(*)).
+# Só escritas objeto a objeto pela sessão (add, delete, alteração de atributo + commit) disparam os eventos:
+# INSERT/UPDATE/DELETE em massa nessas tabelas são recusados abaixo, e SQL direto (sqlite3, text(), scripts
+# de manutenção) deixa os totais errados até `flask --app app init-db` recalculá-los
+# nome do contador -> (modelo, atributo, valor que conta como ativo)
+CONTADORES_TABELAS = {
+    'pacientes': (Paciente, 'ativo', True),
+    'veiculos': (Veiculo, 'ativo', True),
+    'motoristas': (Motorista, 'status', 'ativo'),
+}
+
+def _ajustar_contador(connection, nome, delta):
+    connection.execute(
+        update(EstatisticaTabela)
+        .where(EstatisticaTabela.tabela == nome)
+        .values(total=EstatisticaTabela.total + delta)
+    )
+
+def _registrar_contador(nome, modelo, atributo, valor):
+    """Liga os eventos de inserção, exclusão e alteração do modelo ao contador"""
+    @event.listens_for(modelo, 'after_insert')
+    def _apos_inserir(mapper, connection, target):
+        if getattr(target, atributo) == valor:
+            _ajustar_contador(connection, nome, 1)
+    
+    @event.listens_for(modelo, 'after_delete')
+    def _apos_excluir(mapper, connection, target):
+        if getattr(target, atributo) == valor:
+            _ajustar_contador(connection, nome, -1)
+    
+    # active_history: o ORM carrega o valor anterior antes da alteração, para o after_update comparar
+    @event.listens_for(getattr(modelo, atributo), 'set', active_history=True)
+    def _ao_alterar(target, novo, anterior, initiator):
+        return novo
+    
+    @event.listens_for(modelo, 'after_update')
+    def _apos_atualizar(mapper, connection, target):
+        historico = db.inspect(target).attrs[atributo].history
+        if not historico.deleted:
+            return
+        antes = historico.deleted[0] == valor
+        depois = getattr(target, atributo) == valor
+        if antes != depois:
+            _ajustar_contador(connection, nome, 1 if depois else -1)
+
+for _nome, (_modelo, _atributo, _valor) in CONTADORES_TABELAS.items():
+    _registrar_contador(_nome, _modelo, _atributo, _valor)
+
+MODELOS_CONTADOS = tuple(modelo for modelo, _, _ in CONTADORES_TABELAS.values())
+
+@event.listens_for(Session, 'do_orm_execute')
+def _recusar_escrita_em_massa_contada(execute_state):
+    # insert()/update()/delete() em massa e Query.update()/delete() não passam pelos eventos de cada objeto
+    if not (execute_state.is_insert or execute_state.is_update or execute_state.is_delete):
+        return
+    mapper = execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in MODELOS_CONTADOS:
+        raise RuntimeError(
+            f"Escrita em massa em {mapper.class_.__tablename__} dessincroniza os contadores do dashboard: "
+            "altere os objetos pela sessão do ORM"
+        )
+
+def recalcular_contadores():
+    """Recalcula os contadores a partir das tabelas (init-db ou contador ausente)"""
+    for nome, (modelo, atributo, valor) in CONTADORES_TABELAS.items():
+        total = db.session.scalar(
+            select(func.count()).select_from(modelo).where(getattr(modelo, atributo) == valor)
+        )
+        db.session.merge(EstatisticaTabela(tabela=nome, total=total))
+    db.session.commit()
+
+# Consulta do login montada uma vez (o SQL compilado fica no cache do SQLAlchemy)
+_CONSULTA_USUARIO_POR_USERNAME = select(Usuario).where(Usuario.username == bindparam('username')).limit(1)
+
+def buscar_usuario_por_username(username):
+    """Retorna o usuário com o username informado (ou None)"""
+    return db.session.execute(_CONSULTA_USUARIO_POR_USERNAME, {'username': username}).scalar_one_or_none()
+
+# Colunas do usuário guardadas no cache: só as usadas pelo current_user (sem o hash da senha)
+_USUARIO_CACHE_COLUNAS = ('id', 'username', 'nome_completo', 'tipo_usuario', 'ativo')
+
+@cache.memoize(timeout=60, cache_none=True)
+def get_user_by_id(user_id):
+    """Busca o usuário no banco e retorna um dict desacoplado da sessão (None se não existir)"""
+    usuario = db.session.get(Usuario, user_id)
+    if usuario is None:
+        return None
+    return {coluna: getattr(usuario, coluna) for coluna in _USUARIO_CACHE_COLUNAS}
+
+def invalidar_cache_usuario(user_id):
+    """Remove o usuário do cache (chamar em login, logout e alterações de cadastro)"""
+    cache.delete_memoized(get_user_by_id, int(user_id))
+    cache_request = g.get('_user_cache')
+    if cache_request is not None:
+        cache_request.pop(int(user_id), None)
+
+# ===== CONSULTAS AUXILIARES =====
+def registro_existe(*condicoes):
+    """Verifica existência com SELECT EXISTS, sem carregar as colunas do registro"""
+    return db.session.scalar(select(exists().where(*condicoes)))
+
+def contar_agendamentos_por(coluna):
+    """{id: total de agendamentos} numa única consulta agrupada (em vez de um COUNT por linha do relatório)"""
+    return dict(db.session.execute(select(coluna, func.count()).group_by(coluna)).all())
+
+# Consulta dos agendamentos do dia montada uma vez: só as colunas exibidas no dashboard, em linhas simples (sem objetos do ORM nem identity map)
+_CONSULTA_AGENDAMENTOS_DO_DIA = (
+    select(
+        Agendamento.id,
+        Agendamento.hora,
+        Paciente.nome.label('paciente_nome'),
+        Paciente.telefone.label('paciente_telefone'),
+        func.substr(Agendamento.destino, 1, 50).label('destino'),  # só o trecho exibido
+        Agendamento.status
+    )
+    .join(Paciente)
+    .where(Agendamento.data == bindparam('data'))
+    .order_by(Agendamento.hora)
+)
+
+def consultar_agendamentos_do_dia(hoje):
+    """Agendamentos do dia com nome e telefone do paciente, ordenados por hora"""
+    return db.session.execute(_CONSULTA_AGENDAMENTOS_DO_DIA, {'data': hoje}).all()
+
+# ===== ESTATÍSTICAS DO DASHBOARD =====
+@cache.memoize(timeout=30)
+def obter_estatisticas_dashboard(hoje):
+    """Lê os contadores e a contagem dos agendamentos do dia em uma única consulta (UNION ALL)"""
+    consulta = union_all(
+        select(EstatisticaTabela.tabela, EstatisticaTabela.total),
+        select(literal('agendamentos_hoje'), func.count()).select_from(Agendamento).where(Agendamento.data == hoje)
+    )
+    totais = dict(db.session.execute(consulta).all())
+    if not all(nome in totais for nome in CONTADORES_TABELAS):
+        recalcular_contadores()
+        totais = dict(db.session.execute(consulta).all())
+    return {
+        'total_pacientes': totais['pacientes'],
+        'total_veiculos': totais['veiculos'],
+        'total_motoristas': totais['motoristas'],
+        'agendamentos_hoje': totais['agendamentos_hoje'],
+    }
+
+@cache.memoize(timeout=30)
+def obter_agendamentos_dashboard_json(hoje):
+    """Agendamentos do dia serializados em JSON para a lista do dashboard"""
+    agendamentos_js_data = [{
+        'id': ag.id,
+        'horario_saida': ag.hora.strftime('%H:%M'),
+        'paciente_nome': escape_js_string(ag.paciente_nome),
+        'paciente_telefone': escape_js_string(ag.paciente_telefone),
+        'destino_nome': escape_js_string(ag.destino),
+        'status': ag.status,
+        'status_nome': escape_js_string(ag.status.replace('_', ' ').title()),
+        'status_class': CLASSE_STATUS_AGENDAMENTO.get(ag.status, 'secondary')
+    } for ag in consultar_agendamentos_do_dia(hoje)]
+    
+    # Converter para JSON seguro
+    return json.dumps(agendamentos_js_data)
+
+@cache.memoize(timeout=30)
+def obter_dados_dashboard_api(hoje):
+    """Contadores, agendamentos do dia e ETag (fraca, sem o timestamp) da API do dashboard"""
+    totais = obter_estatisticas_dashboard(hoje)
+    stats = {
+        'agendamentos_hoje': totais['agendamentos_hoje'],
+        'pacientes_ativos': totais['total_pacientes'],
+        'motoristas_disponiveis': totais['total_motoristas'],
+        'veiculos_disponiveis': totais['total_veiculos']
+    }
+    
+    # Linhas já projetadas pela consulta
+    agendamentos_hoje = [{
+        'id': ag.id,
+        'horario_saida': ag.hora.strftime('%H:%M'),
+        'paciente_nome': ag.paciente_nome,
+        'paciente_telefone': ag.paciente_telefone,
+        'destino_nome': ag.destino,
+        'status': ag.status,
+        'status_nome': ag.status.replace('_', ' ').title()
+    } for ag in consultar_agendamentos_do_dia(hoje)]
+    
+    etag = hashlib.blake2b(orjson.dumps([stats, agendamentos_hoje]), digest_size=16).hexdigest()
+    return stats, agendamentos_hoje, etag
+
+def invalidar_estatisticas_dashboard():
+    """Descarta os contadores e as listas do dashboard em cache (feito automaticamente após commits que alteram os totais)"""
+    cache.delete_memoized(obter_estatisticas_dashboard)
+    cache.delete_memoized(obter_agendamentos_dashboard_json)
+    cache.delete_memoized(obter_dados_dashboard_api)
+
+# Modelos cujas alterações mudam os números do dashboard
+MODELOS_ESTATISTICAS = (Paciente, Veiculo, Motorista, Agendamento)
+
+@event.listens_for(Session, 'after_flush')
+def _marcar_estatisticas_alteradas(session, flush_context):
+    alterados = session.new | session.dirty | session.deleted
+    if any(isinstance(obj, MODELOS_ESTATISTICAS) for obj in alterados):
+        session.info['estatisticas_alteradas'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_estatisticas_apos_commit(session):
+    if session.info.pop('estatisticas_alteradas', False):
+        invalidar_estatisticas_dashboard()
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_marcacao_estatisticas(session):
+    session.info.pop('estatisticas_alteradas', None)
+
+# ===== CACHE DE CREDENCIAIS VERIFICADAS =====
+def _chave_senha_verificada(username, password):
+    """Chave do cache de credenciais (a senha nunca é armazenada em texto puro)"""
+    return 'senha_verificada:' + hashlib.sha256(f"{username}:{password}".encode('utf-8')).hexdigest()
+
+def verificar_senha_login(user, username, password):
+    """Verifica a senha do login, reaproveitando verificações recentes quando habilitado"""
+    if not current_app.config.get('USE_VERIFY_PASSWORD_CACHE'):
+        return user.check_password(password)
+    
+    chave = _chave_senha_verificada(username, password)
+    if cache.get(chave) == user.id:
+        return True
+    
+    if not user.check_password(password):
+        return False
+    
+    # Só guarda credenciais corretas
+    cache.set(chave, user.id, timeout=60)
+    cache.set(f'senha_verificada_usuario:{user.id}', chave, timeout=60)
+    return True
+
+def invalidar_senha_verificada(user_id):
+    """Descarta a credencial verificada do usuário (logout ou troca de senha)"""
+    chave = cache.get(f'senha_verificada_usuario:{user_id}')
+    if chave:
+        cache.delete(chave)
+    cache.delete(f'senha_verificada_usuario:{user_id}')
+
 @login_manager.user_loader
 def load_user(user_id):
+    # Só o id inválido no cookie vira "não logado"; falhas do cache ou do banco aparecem como erro
     try:
-        return Usuario.query.get(int(user_id))
-    except:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
         return None
+    
+    cache_request = g.setdefault('_user_cache', {})
+    if user_id in cache_request:
+        return cache_request[user_id]
+    
+    dados = get_user_by_id(user_id)
+    usuario = Usuario(**dados) if dados is not None else None
+    cache_request[user_id] = usuario
+    return usuario
+
+def assinatura_schema():
+    """Hash do DDL das tabelas e índices declarados nos modelos (muda quando o schema muda)"""
+    dialeto = db.engine.dialect
+    ddl = []
+    for tabela in db.metadata.sorted_tables:
+        ddl.append(str(CreateTable(tabela).compile(dialect=dialeto)))
+        ddl.extend(str(CreateIndex(indice).compile(dialect=dialeto)) for indice in sorted(tabela.indexes, key=lambda i: i.name))
+    return hashlib.sha256(''.join(ddl).encode('utf-8')).hexdigest()
 
-def verificar_e_criar_banco():
-    """Verifica se o banco existe e cria se necessário"""
+def verificar_e_criar_banco(forcar=False):
+    """Verifica se o banco existe e cria se necessário (forcar=True refaz a verificação mesmo já marcada)"""
     basedir = os.path.abspath(os.path.dirname(__file__))
     db_dir = os.path.join(basedir, 'db')
     db_path = os.path.join(db_dir, 'transporte_pacientes.db')
+    # Marca gravada após uma verificação completa: guarda a assinatura do schema verificado
+    sentinela = os.path.join(db_dir, '.banco_verificado')
     
     print(f"🔍 Verificando banco em: {db_path}")
     
-    # Criar diretório se não existir
-    if not os.path.exists(db_dir):
-        print(f"📁 Criando diretório: {db_dir}")
-        os.makedirs(db_dir, exist_ok=True)
+    # Criar diretório se não existir (uma única chamada, sem stat prévio)
+    Path(db_dir).mkdir(parents=True, exist_ok=True)
+    
+    # Reinícios com o mesmo schema já verificado: sem create_all, índices, admin nem recontagem
+    assinatura = assinatura_schema()
+    if not forcar and os.path.exists(db_path):
+        try:
+            with open(sentinela, encoding='utf-8') as arquivo:
+                if arquivo.read() == assinatura:
+                    print(f"✅ Banco de dados já verificado: {db_path}")
+                    return db_path
+        except OSError:
+            pass
     
     # Verificar se o banco existe
     if not os.path.exists(db_path):
@@ -361,10 +883,43 @@ def verificar_e_criar_banco():
         criar_banco_e_usuario()
     else:
         print(f"✅ Banco de dados encontrado: {db_path}")
+        db.create_all()
+        criar_indices_ausentes()
         verificar_usuario_admin()
     
+    recalcular_contadores()
+    print("✅ Contadores de registros atualizados")
+    
+    with open(sentinela, 'w', encoding='utf-8') as arquivo:
+        arquivo.write(assinatura)
+    
     return db_path
 
+def criar_indices_ausentes():
+    """Cria em bancos já existentes os índices declarados nos modelos (create_all não altera tabelas)"""
+    for tabela in db.metadata.sorted_tables:
+        for indice in tabela.indexes:
+            indice.create(db.engine, checkfirst=True)
+    
+    # Atualiza as estatísticas do planejador (ANALYZE só onde necessário) para as contagens usarem os índices
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql('PRAGMA optimize')
+
+def inserir_admin_padrao():
+    """Insere o admin padrão se o username ainda não existir (o hash bcrypt só é gerado quando vai ser inserido)"""
+    if registro_existe(Usuario.username == 'admin'):
+        return False
+    # ON CONFLICT continua cobrindo outro processo que insira o admin entre o EXISTS e o INSERT
+    stmt = sqlite_insert(Usuario).values(
+        username='admin',
+        nome_completo='Administrador do Sistema',
+        email='admin@cosmopolis.sp.gov.br',
+        tipo_usuario='administrador',
+        ativo=True,
+        password_hash=gerar_hash_senha('admin123')
+    ).on_conflict_do_nothing(index_elements=['username'])
+    return db.session.execute(stmt).rowcount == 1
+
 def criar_banco_e_usuario():
     """Cria o banco e o usuário administrador"""
     try:
@@ -373,16 +928,7 @@ def criar_banco_e_usuario():
         print("✅ Tabelas criadas no banco de dados")
         
         # Criar usuário admin
-        admin = Usuario(
-            username='admin',
-            nome_completo='Administrador do Sistema',
-            email='admin@cosmopolis.sp.gov.br',
-            tipo_usuario='administrador',
-            ativo=True
-        )
-        admin.set_password('admin123')
-        
-        db.session.add(admin)
+        inserir_admin_padrao()
         db.session.commit()
         print("✅ Usuário administrador criado: admin / admin123")
         
@@ -391,152 +937,154 @@ def criar_banco_e_usuario():
         db.session.rollback()
 
 def verificar_usuario_admin():
-    """Verifica se o usuário admin existe e tem hash válido"""
+    """Verifica se o usuário admin existe e tem hash válido (tudo em uma única transação)"""
     try:
-        admin = Usuario.query.filter_by(username='admin').first()
-        if not admin:
-            print("❌ Usuário admin não encontrado. Criando...")
-            criar_banco_e_usuario()
+        # Admin existente com hash atual: nenhum bcrypt no boot (hash só para inserir ou resetar)
+        admin = buscar_usuario_por_username('admin')
+        if admin is None:
+            inserir_admin_padrao()
+            print("✅ Usuário admin não encontrado. Criado: admin / admin123")
+        elif not admin.hash_precisa_atualizar():
+            # bcrypt no custo atual já é um hash válido: o boot não paga uma verificação bcrypt
+            print("✅ Usuário admin válido encontrado")
+        elif not admin.check_password('admin123'):
+            print("❌ Hash do usuário admin inválido. Resetando senha...")
+            admin.set_password('admin123')
+            print("✅ Senha do usuário admin resetada para: admin123")
         else:
-            if not admin.check_password('admin123'):
-                print("❌ Hash do usuário admin inválido. Resetando senha...")
-                admin.set_password('admin123')
-                db.session.commit()
-                print("✅ Senha do usuário admin resetada para: admin123")
-            else:
-                print("✅ Usuário admin válido encontrado")
+            print("✅ Usuário admin válido encontrado")
+        db.session.commit()
     except Exception as e:
         print(f"❌ Erro ao verificar usuário admin: {e}")
+        db.session.rollback()
+
+# Classe (Bootstrap) e cor de cada status de agendamento, usadas nas listagens
+CLASSE_STATUS_AGENDAMENTO = {
+    'confirmado': 'success',
+    'agendado': 'warning',
+    'em_andamento': 'primary',
+    'concluido': 'secondary'
+}
+
+COR_STATUS_AGENDAMENTO = {
+    'agendado': 'color: var(--warning-color);',
+    'confirmado': 'color: var(--info-color);',
+    'em_andamento': 'color: var(--primary-color);',
+    'concluido': 'color: var(--success-color);',
+    'cancelado': 'color: var(--danger-color);'
+}
+
+# Opções fixas dos selects de cadastro: (valor gravado no banco, rótulo exibido)
+CATEGORIAS_CNH = (
+    ('A', 'A - Motocicleta'),
+    ('B', 'B - Carro'),
+    ('C', 'C - Caminhão'),
+    ('D', 'D - Ônibus'),
+    ('E', 'E - Carreta'),
+)
+
+STATUS_MOTORISTA = (
+    ('ativo', 'Ativo'),
+    ('inativo', 'Inativo'),
+    ('ferias', 'Férias'),
+    ('licenca', 'Licença'),
+)
+
+TIPOS_VEICULO = (
+    ('ambulancia', 'Ambulância'),
+    ('van', 'Van'),
+    ('micro_onibus', 'Micro-ônibus'),
+    ('carro', 'Carro'),
+)
+
+MESES = (
+    (1, 'Janeiro'), (2, 'Fevereiro'), (3, 'Março'), (4, 'Abril'),
+    (5, 'Maio'), (6, 'Junho'), (7, 'Julho'), (8, 'Agosto'),
+    (9, 'Setembro'), (10, 'Outubro'), (11, 'Novembro'), (12, 'Dezembro')
+)
+
+TIPOS_TRANSPORTE = (
+    ('consulta', 'Consulta Médica'),
+    ('exame', 'Exame'),
+    ('cirurgia', 'Cirurgia'),
+    ('tratamento', 'Tratamento'),
+    ('emergencia', 'Emergência'),
+)
+
+_OPCAO_HTML = Markup('<option value="{}">{}</option>')
+
+def opcoes_html(pares, placeholder=None):
+    """Monta os <option> de um select a partir de pares (valor, rótulo), num único join (valores escapados)"""
+    opcoes = Markup('').join(_OPCAO_HTML.format(valor, rotulo) for valor, rotulo in pares)
+    return _OPCAO_HTML.format('', placeholder) + opcoes if placeholder else opcoes
+
+# Montadas uma única vez na importação; os templates recebem via global opcoes_select
+OPCOES_SELECT = {
+    'categoria_cnh': opcoes_html(CATEGORIAS_CNH, 'Selecione...'),
+    'status_motorista': opcoes_html(STATUS_MOTORISTA),
+    'tipo_veiculo': opcoes_html(TIPOS_VEICULO, 'Selecione...'),
+    'tipo_transporte': opcoes_html(TIPOS_TRANSPORTE, 'Selecione...'),
+    'mes': opcoes_html(MESES),
+}
+
+# ===== CACHE DE PÁGINAS =====
+# Páginas HTML que respondem com ETag (304 quando o navegador já tem a mesma versão)
+PAGINAS_COM_ETAG = {
+    'pacientes_cadastrar', 'veiculos_cadastrar', 'motoristas_cadastrar', 'agendamentos_novo',
+    'motoristas', 'agendamentos',
+}
+
+def chave_pagina_usuario():
+    """Chave do cache de páginas por usuário (o layout mostra o nome e os menus conforme o perfil)"""
+    return f"pagina{request.path}/{current_user.get_id()}"
+
+def pagina_nao_cacheavel():
+    """POSTs e páginas com mensagens flash pendentes são sempre geradas na hora"""
+    return request.method != 'GET' or '_flashes' in session
+
+# Card exibido nas listagens vazias (mesmo HTML em todas as telas, muda só o texto)
+_CARD_VAZIO_HTML = '<div class="card"><div class="coming-soon"><div class="icon">{icone}</div><h3>{titulo}</h3><p>{mensagem}</p></div></div>'
+
+@lru_cache(maxsize=16)
+def card_vazio(icone, titulo, mensagem):
+    """HTML do card de listagem vazia (montado uma vez por tela)"""
+    return _CARD_VAZIO_HTML.format(icone=icone, titulo=titulo, mensagem=mensagem)
+
+def truncar_texto(texto, limite):
+    """Corta o texto no limite, indicando com reticências quando foi cortado"""
+    return texto[:limite] + ('...' if len(texto) > limite else '')
+
+# Função para escapar strings para JavaScript (tabela montada uma vez; translate percorre a string uma só vez)
+_ESCAPE_JS = str.maketrans({'\\': '\\\\', '"': '\\"', "'": "\\'", '\n': '\\n', '\r': '\\r'})
 
-# Função para escapar strings para JavaScript
 def escape_js_string(s):
     """Escapa uma string para uso seguro em JavaScript"""
     if s is None:
         return ''
-    return str(s).replace('\\', '\\\\').replace('"', '\\"').replace("'", "\\'").replace('\n', '\\n').replace('\r', '\\r')
+    return str(s).translate(_ESCAPE_JS)
 
 def gerar_layout_base(titulo, conteudo, ativo=""):
-    """Gera o layout base para todas as páginas"""
-    return f'''
-    <html>
-    <head>
-        <title>{titulo} - Sistema de Transporte</title>
-        <style>
-            :root {{
-                --color-100: #ffffff;
-                --color-95: #ebf9f9;
-                --primary-color: #4fc9c4;
-                --primary-dark: #43aca7;
-                --primary-hover: #3c9b96;
-                --secondary-color: #6d7a8c;
-                --text-color: #3f485d;
-                --border-color: #e5e5e5;
-                --success-color: #79b24a;
-                --warning-color: #f2823c;
-                --danger-color: #e81d51;
-                --info-color: #91ceff;
-                --gray-color: #6d7a8c;
-                --input-focus: #4fc9c4;
-                --input-focus-shadow: rgba(79, 201, 196, 0.25);
-            }}
-            
-            body {{ font-family: Arial, sans-serif; margin: 0; padding: 0; background: var(--color-95); }}
-            .header {{ background: linear-gradient(135deg, var(--primary-color), var(--primary-dark)); color: var(--color-100); padding: 1rem 2rem; }}
-            .header h1 {{ margin: 0; }}
-            .header .user-info {{ float: right; }}
-            .nav {{ background: var(--color-100); padding: 0.5rem 2rem; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
-            .nav a {{ color: var(--text-color); text-decoration: none; margin-right: 2rem; padding: 0.5rem 1rem; border-radius: 0.25rem; transition: all 0.3s ease; }}
-            .nav a:hover {{ background: var(--color-95); color: var(--primary-color); }}
-            .nav a.active {{ background: var(--primary-color); color: var(--color-100); }}
-            .container {{ padding: 2rem; max-width: 1400px; margin: 0 auto; }}
-            .page-header {{ margin-bottom: 2rem; }}
-            .page-header h2 {{ color: var(--primary-color); margin: 0 0 0.5rem 0; }}
-            .page-header p {{ color: var(--gray-color); margin: 0; }}
-            .card {{ background: var(--color-100); padding: 2rem; border-radius: 1rem; box-shadow: 0 0.125rem 0.25rem rgba(0,0,0,0.075); border-left: 4px solid var(--primary-color); margin-bottom: 1rem; }}
-            .btn {{ padding: 0.75rem 1.5rem; background: var(--primary-color); color: var(--color-100); border: none; border-radius: 0.5rem; cursor: pointer; text-decoration: none; display: inline-block; transition: background-color 0.3s ease; }}
-            .btn:hover {{ background: var(--primary-dark); }}
-            .btn-secondary {{ background: var(--secondary-color); }}
-            .btn-secondary:hover {{ background: var(--gray-color); }}
-            .btn-success {{ background: var(--success-color); }}
-            .btn-success:hover {{ background: #6a9d3e; }}
-            .btn-warning {{ background: var(--warning-color); }}
-            .btn-warning:hover {{ background: #e6762f; }}
-            .logout {{ background: var(--danger-color); color: var(--color-100); padding: 0.5rem 1rem; border: none; border-radius: 0.5rem; cursor: pointer; text-decoration: none; transition: background-color 0.3s ease; }}
-            .logout:hover {{ background: #c81841; }}
-            .coming-soon {{ text-align: center; padding: 4rem 2rem; }}
-            .coming-soon .icon {{ font-size: 4rem; margin-bottom: 1rem; color: var(--primary-color); }}
-            .coming-soon h3 {{ color: var(--text-color); margin-bottom: 1rem; }}
-            .coming-soon p {{ color: var(--gray-color); }}
-            .form-group {{ margin-bottom: 1rem; }}
-            .form-group label {{ display: block; margin-bottom: 0.5rem; color: var(--text-color); font-weight: 600; }}
-            .form-group input, .form-group select, .form-group textarea {{ width: 100%; padding: 0.75rem; border: 2px solid var(--border-color); border-radius: 0.5rem; font-size: 1rem; box-sizing: border-box; }}
-            .form-group input:focus, .form-group select:focus, .form-group textarea:focus {{ border-color: var(--input-focus); outline: none; box-shadow: 0 0 0 3px var(--input-focus-shadow); }}
-            .form-row {{ display: grid; grid-template-columns: 1fr 1fr; gap: 1rem; }}
-            .breadcrumb {{ margin-bottom: 1rem; color: var(--gray-color); }}
-            .breadcrumb a {{ color: var(--primary-color); text-decoration: none; }}
-            .breadcrumb a:hover {{ text-decoration: underline; }}
-            .alert {{ padding: 0.75rem; margin-bottom: 1rem; border-radius: 0.5rem; }}
-            .alert-error {{ background: rgba(232, 29, 81, 0.1); color: var(--danger-color); border: 1px solid var(--danger-color); }}
-            .alert-success {{ background: rgba(121, 178, 74, 0.1); color: var(--success-color); border: 1px solid var(--success-color); }}
-            .alert-warning {{ background: rgba(242, 130, 60, 0.1); color: var(--warning-color); border: 1px solid var(--warning-color); }}
-            
-            /* Estilos para relatórios */
-            .tabs {{ display: flex; border-bottom: 2px solid var(--border-color); margin-bottom: 2rem; }}
-            .tab {{ padding: 1rem 2rem; background: transparent; border: none; cursor: pointer; color: var(--gray-color); font-weight: 600; transition: all 0.3s ease; }}
-            .tab.active {{ color: var(--primary-color); border-bottom: 2px solid var(--primary-color); }}
-            .tab:hover {{ color: var(--primary-color); }}
-            .tab-content {{ display: none; }}
-            .tab-content.active {{ display: block; }}
-            .filters {{ background: var(--color-95); padding: 1.5rem; border-radius: 0.5rem; margin-bottom: 2rem; }}
-            .filters-row {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1rem; align-items: end; }}
-            .table-container {{ overflow-x: auto; }}
-            .report-table {{ width: 100%; border-collapse: collapse; margin-bottom: 2rem; }}
-            .report-table th {{ background: var(--primary-color); color: var(--color-100); padding: 1rem; text-align: left; }}
-            .report-table td {{ padding: 0.75rem; border-bottom: 1px solid var(--border-color); }}
-            .report-table tr:hover {{ background: var(--color-95); }}
-            .print-btn {{ background: var(--info-color); }}
-            .print-btn:hover {{ background: #7bb8ff; }}
-            
-            @media print {{
-                .no-print {{ display: none !important; }}
-                .page-header, .nav, .header, .filters {{ display: none !important; }}
-                .container {{ padding: 0; max-width: none; }}
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="header no-print">
-            <h1>🚑 Sistema de Transporte de Pacientes</h1>
-            <div class="user-info">
-                Bem-vindo, {current_user.nome_completo}! 
-                <a href="{url_for('logout')}" class="logout">Sair</a>
-            </div>
-            <div style="clear: both;"></div>
-        </div>
-        
-        <div class="nav no-print">
-            <a href="{url_for('dashboard')}" class="{'active' if ativo == 'dashboard' else ''}">🏠 Dashboard</a>
-            <a href="{url_for('pacientes')}" class="{'active' if ativo == 'pacientes' else ''}">👥 Pacientes</a>
-            <a href="{url_for('veiculos')}" class="{'active' if ativo == 'veiculos' else ''}">🚗 Veículos</a>
-            <a href="{url_for('motoristas')}" class="{'active' if ativo == 'motoristas' else ''}">👨‍💼 Motoristas</a>
-            <a href="{url_for('agendamentos')}" class="{'active' if ativo == 'agendamentos' else ''}">📅 Agendamentos</a>
-            <a href="{url_for('relatorios')}" class="{'active' if ativo == 'relatorios' else ''}">📊 Relatórios</a>
-            <a href="{url_for('uso_veiculos')}" class="{'active' if ativo == 'uso_veiculos' else ''}">🚗 Controle de Uso</a>
-            {'<a href="/faturamento" class="' + ('active' if ativo == 'faturamento' else '') + '">💰 Faturamento</a>' if current_user.is_authenticated and hasattr(current_user, "can_view_finances") and current_user.can_view_finances() else ''}
-            {'<a href="/usuarios" class="active" if ativo == "usuarios" else "">👥 Usuários</a>' if current_user.is_authenticated and hasattr(current_user, "tipo_usuario") and current_user.tipo_usuario == "administrador" else ''}
-        </div>   
-
-        
-        <div class="container">
-            {conteudo}
-        </div>
-    </body>
-    </html>
-    '''
+    """Gera o layout base para todas as páginas (templates/base.html + static/css/app.css)"""
+    return render_template('base.html', titulo=titulo, conteudo=conteudo, ativo=ativo)
+
+DIRETORIOS_APLICACAO = ['uploads', 'relatorios', 'static/css', 'static/js', 'static/img']
 
-def create_app():
+def criar_diretorios(basedir):
+    """Cria os diretórios usados pela aplicação"""
+    for dir_name in DIRETORIOS_APLICACAO:
+        os.makedirs(os.path.join(basedir, dir_name), exist_ok=True)
+
+def aquecer_conexao_banco(app):
+    """Abre uma conexão no boot (PRAGMAs aplicados antes da primeira requisição); com SQLite em arquivo, abrir mais conexões não ganha nada"""
+    with app.app_context():
+        with db.engine.connect() as conexao:
+            conexao.execute(text('SELECT 1'))
+
+def create_app(config=None):
+    """Cria a aplicação; config sobrescreve a configuração padrão (ex.: TESTING e banco temporário nos testes)"""
     global app
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     
     # Configuração com caminho absoluto
     basedir = os.path.abspath(os.path.dirname(__file__))
@@ -545,33 +1093,146 @@ def create_app():
     app.config['SECRET_KEY'] = 'cosmopolis_sistema_transporte_2024'
     app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    
-    # Criar outros diretórios necessários
-    for dir_name in ['uploads', 'relatorios', 'static/css', 'static/js', 'static/img']:
-        dir_path = os.path.join(basedir, dir_name)
-        os.makedirs(dir_path, exist_ok=True)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'connect_args': {'check_same_thread': False, 'timeout': 5},
+        'pool_pre_ping': True,
+        'pool_size': 10,
+        'max_overflow': 20,
+        'pool_recycle': 1800
+    }
+    
+    # Criar outros diretórios necessários (em produção já existem: SKIP_MKDIRS=true evita os syscalls a cada boot)
+    app.config['SKIP_MKDIRS'] = os.environ.get('SKIP_MKDIRS', 'False').lower() == 'true'
+    if not app.config['SKIP_MKDIRS']:
+        criar_diretorios(basedir)
+    
+    # Só reenvia o cookie de sessão quando o conteúdo muda (evita assinar o cookie a cada resposta)
+    app.config['SESSION_REFRESH_EACH_REQUEST'] = False
+    app.config['REMEMBER_COOKIE_REFRESH_EACH_REQUEST'] = False
+    
+    # Cache de usuários logados, estatísticas e páginas. O padrão (SimpleCache) fica na memória do processo:
+    # com vários processos (gunicorn -w, uWSGI --processes) a invalidação após um commit só alcança o processo
+    # que gravou, então use um backend compartilhado (CACHE_TYPE=RedisCache + CACHE_REDIS_URL ou
+    # CACHE_TYPE=FileSystemCache + CACHE_DIR)
+    app.config['CACHE_TYPE'] = os.environ.get('CACHE_TYPE', 'SimpleCache')
+    for chave_cache in ('CACHE_REDIS_URL', 'CACHE_DIR'):
+        if os.environ.get(chave_cache):
+            app.config[chave_cache] = os.environ[chave_cache]
+    app.config['CACHE_DEFAULT_TIMEOUT'] = 300
+    app.config['USE_VERIFY_PASSWORD_CACHE'] = os.environ.get('USE_VERIFY_PASSWORD_CACHE', 'False').lower() == 'true'
+    
+    # Compressão das respostas (o CSS inline das páginas se repete muito e comprime bem)
+    app.config['COMPRESS_MIN_SIZE'] = 500
+    app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+    app.config['COMPRESS_LEVEL'] = 6
+    # Só os tipos que o sistema serve (páginas, API do dashboard e estáticos)
+    app.config['COMPRESS_MIMETYPES'] = ['text/html', 'application/json', 'text/css', 'application/javascript', 'text/javascript']
+    
+    # Limite de tentativas de login (contadores em memória do processo)
+    app.config['RATELIMIT_STORAGE_URI'] = 'memory://'
+    
+    if config:
+        app.config.update(config)
     
     # Inicializar extensões
     db.init_app(app)
     login_manager.init_app(app)
+    cache.init_app(app)
+    compress.init_app(app)
+    limiter.init_app(app)
+    app.jinja_env.globals['url_for'] = url_for
+    app.jinja_env.filters['truncar'] = truncar_texto
+    app.jinja_env.globals['opcoes_select'] = OPCOES_SELECT
+    app.jinja_env.globals['permissoes_usuario'] = permissoes_usuario
+    
+    # Nível de log (DEBUG mostra o rastreio do login e da API do dashboard)
+    app.logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+    
+    # CSS e JS estáticos ficam em cache no navegador
+    app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 3600
+    
+    @app.before_request
+    def estaticos_pre_comprimidos():
+        # CSS/JS comprimidos uma vez e reaproveitados (sem recomprimir o arquivo a cada requisição)
+        if request.endpoint == 'static' and request.method in ('GET', 'HEAD'):
+            return resposta_estatico_comprimido(app.static_folder, request.view_args['filename'])
+    
+    @app.after_request
+    def cache_estaticos_versionados(response):
+        # URL com ?v=<hash do conteúdo> nunca muda de conteúdo: cache de 1 ano sem revalidação
+        if request.endpoint == 'static' and 'v' in request.args and response.status_code == 200:
+            response.cache_control.max_age = 31536000
+            response.cache_control.immutable = True
+            response.headers.pop('Expires', None)
+        return response
+    
+    # Máximo de consultas SQL por requisição (0 = sem verificação). Sem a variável: LIMITE_CONSULTAS_DEBUG
+    # em debug/testes (estourar é erro) e sem limite em produção (com a variável, produção só registra aviso)
+    if os.environ.get('SQL_LIMITE_CONSULTAS'):
+        app.config.setdefault('SQL_LIMITE_CONSULTAS', int(os.environ['SQL_LIMITE_CONSULTAS']))
+    
+    @app.after_request
+    def verificar_consultas_por_requisicao(response):
+        # Limite estourado dentro de um try/except da view: o erro não pode virar uma resposta normal
+        if g.get('consultas_excedidas'):
+            raise RuntimeError(g.consultas_excedidas)
+        return response
+    
+    @app.after_request
+    def etag_paginas(response):
+        # Páginas de cadastro e listagens: ETag do HTML gerado; se nada mudou, o navegador recebe 304 sem corpo
+        if (request.method == 'GET' and request.endpoint in PAGINAS_COM_ETAG
+                and response.status_code == 200 and not response.is_streamed):
+            response.add_etag()
+            # Conteúdo do usuário logado: só o navegador guarda, sempre revalidando
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            response.make_conditional(request)
+        return response
+    
+    # Templates compilados ficam em cache no disco (sobrevivem a reinícios dos workers)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+    # Também no config: sem isso, FLASK_DEBUG/--debug religa o auto_reload (stat() de cada template por render)
+    app.config['TEMPLATES_AUTO_RELOAD'] = os.environ.get('TEMPLATES_AUTO_RELOAD', 'False').lower() == 'true'
+    app.jinja_env.auto_reload = app.config['TEMPLATES_AUTO_RELOAD']
+    
+    # Compila os templates no boot: a primeira requisição já encontra o Template pronto no cache do ambiente
+    for nome_template in app.jinja_env.list_templates(extensions=['html']):
+        app.jinja_env.get_template(nome_template)
     
     # Configurar Login Manager
     login_manager.login_view = 'login'
     login_manager.login_message = 'Por favor, faça login para acessar esta página.'
     login_manager.login_message_category = 'info'
     
-    # Verificar e criar banco dentro do contexto da aplicação
-    with app.app_context():
-        verificar_e_criar_banco()
+    # Compila os mapeamentos dos modelos no boot, e não na primeira requisição do usuário
+    configure_mappers()
+    
+    # Só aquece a conexão se o banco já existe (a conexão criaria um arquivo vazio antes do init-db);
+    # testes e comandos da CLI (init-db, setup-dirs) não atendem requisições
+    if not app.testing and click.get_current_context(silent=True) is None and os.path.exists(db_path):
+        aquecer_conexao_banco(app)
+    
+    # Banco e usuário admin são preparados uma única vez via CLI (flask init-db),
+    # e não a cada processo/worker que importa a aplicação
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Cria as tabelas e o usuário administrador padrão"""
+        verificar_e_criar_banco(forcar=True)
+    
+    @app.cli.command('setup-dirs')
+    def setup_dirs_command():
+        """Cria os diretórios de uploads, relatórios e arquivos estáticos"""
+        criar_diretorios(basedir)
     
     # ===== ROTAS =====
     @app.route('/')
     def index():
-        if current_user.is_authenticated:
-            return redirect(url_for('dashboard'))
-        return redirect(url_for('login'))
+        # Consulta só o cookie de sessão (chave gravada pelo Flask-Login) sem carregar o usuário do banco
+        return redirect(url_for('dashboard' if '_user_id' in session else 'login'))
     
     @app.route('/login', methods=['GET', 'POST'])
+    @limiter.limit('10/minute', methods=['POST'])
     def login():
         if request.method == 'POST':
             username = request.form.get('username', '').strip()
@@ -582,729 +1243,68 @@ def create_app():
                 return redirect(url_for('login'))
             
             try:
-                user = Usuario.query.filter_by(username=username).first()
-                print(f"🔍 Usuário encontrado: {user is not None}")
+                user = buscar_usuario_por_username(username)
+                logger.debug("🔍 Usuário encontrado: %s", user is not None)
                 
                 if user:
-                    print(f"🔐 Verificando senha para usuário: {user.username}")
+                    logger.debug("🔐 Verificando senha para usuário: %s", user.username)
                     
-                    if user.check_password(password):
+                    if verificar_senha_login(user, username, password):
+                        invalidar_cache_usuario(user.id)
                         login_user(user)
                         session.pop('_flashes', None)
                         flash('Login realizado com sucesso!', 'success')
-                        print(f"✅ Login bem-sucedido para: {user.username}")
+                        logger.info("✅ Login bem-sucedido para: %s", user.username)
                         return redirect(url_for('dashboard'))
                     else:
-                        flash('Senha incorreta!', 'error')
-                        print(f"❌ Senha incorreta para: {user.username}")
+                        flash('Usuário ou senha inválidos!', 'error')
+                        logger.warning("❌ Senha incorreta para: %s", user.username)
                 else:
-                    flash('Usuário não encontrado!', 'error')
-                    print(f"❌ Usuário não encontrado: {username}")
+                    bcrypt.checkpw(password.encode('utf-8'), _DUMMY_HASH)
+                    flash('Usuário ou senha inválidos!', 'error')
+                    logger.warning("❌ Usuário não encontrado: %s", username)
                     
             except Exception as e:
                 flash(f'Erro ao fazer login: {str(e)}', 'error')
-                print(f"❌ Erro de login: {e}")
+                logger.error("❌ Erro de login: %s", e)
         
-        # Gerar alertas de mensagens flash
-        messages_html = ""
-        for category, message in get_flashed_messages(with_categories=True):
-            alert_class = "alert-error" if category == "error" else "alert-success"
-            messages_html += f'<div class="alert {alert_class}">{message}</div>'
-        
-        return f'''
-        <html>
-        <head>
-            <title>Login - Sistema de Transporte</title>
-            <style>
-                :root {{
-                    --color-100: #ffffff;
-                    --color-95: #ebf9f9;
-                    --primary-color: #4fc9c4;
-                    --primary-dark: #43aca7;
-                    --primary-hover: #3c9b96;
-                    --text-color: #3f485d;
-                    --border-color: #e5e5e5;
-                    --success-color: #79b24a;
-                    --danger-color: #e81d51;
-                    --gray-color: #6d7a8c;
-                    --input-focus: #4fc9c4;
-                    --input-focus-shadow: rgba(79, 201, 196, 0.25);
-                }}
-                
-                body {{ font-family: Arial, sans-serif; margin: 0; padding: 0; background: linear-gradient(135deg, var(--primary-color), var(--primary-dark)); min-height: 100vh; display: flex; align-items: center; justify-content: center; }}
-                .login-container {{ background: var(--color-100); padding: 2rem; border-radius: 1rem; box-shadow: 0 0.5rem 2rem rgba(0,0,0,0.2); max-width: 400px; width: 100%; }}
-                .header {{ text-align: center; margin-bottom: 2rem; }}
-                .header h1 {{ color: var(--primary-color); margin: 0; }}
-                .header p {{ color: var(--gray-color); margin: 0.5rem 0 0 0; }}
-                .form-group {{ margin-bottom: 1rem; }}
-                .form-group label {{ display: block; margin-bottom: 0.5rem; color: var(--text-color); font-weight: 600; }}
-                .form-group input {{ width: 100%; padding: 0.75rem; border: 2px solid var(--border-color); border-radius: 0.5rem; font-size: 1rem; box-sizing: border-box; }}
-                .form-group input:focus {{ border-color: var(--input-focus); outline: none; box-shadow: 0 0 0 3px var(--input-focus-shadow); }}
-                .btn {{ width: 100%; padding: 0.75rem; background: var(--primary-color); color: var(--color-100); border: none; border-radius: 0.5rem; font-size: 1rem; cursor: pointer; transition: background-color 0.3s ease; }}
-                .btn:hover {{ background: var(--primary-dark); }}
-                .btn:active {{ background: var(--primary-hover); }}
-                .alert {{ padding: 0.75rem; margin-bottom: 1rem; border-radius: 0.5rem; }}
-                .alert-error {{ background: rgba(232, 29, 81, 0.1); color: var(--danger-color); border: 1px solid var(--danger-color); }}
-                .alert-success {{ background: rgba(121, 178, 74, 0.1); color: var(--success-color); border: 1px solid var(--success-color); }}
-                .default-info {{ background: var(--color-95); padding: 1rem; border-radius: 0.5rem; margin-top: 1rem; font-size: 0.875rem; border-left: 4px solid var(--primary-color); }}
-            </style>
-        </head>
-        <body>
-            <div class="login-container">
-                <div class="header">
-                    <h1>🚑 Sistema de Transporte</h1>
-                    <p>Prefeitura Municipal de Cosmópolis</p>
-                </div>
-                
-                {messages_html}
-                
-                <form method="POST">
-                    <div class="form-group">
-                        <label for="username">Usuário:</label>
-                        <input type="text" id="username" name="username" required>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label for="password">Senha:</label>
-                        <input type="password" id="password" name="password" required>
-                    </div>
-                    
-                    <button type="submit" class="btn">Entrar</button>
-                </form>
-                
-                <div class="default-info">
-                    <strong>💡 Acesso Padrão:</strong><br>
-                    <strong>Usuário:</strong> admin<br>
-                    <strong>Senha:</strong> admin123
-                </div>
-            </div>
-        </body>
-        </html>
-        '''
+        return render_template('login.html', saiu=request.args.get('saiu') == '1')
     
     # ===== DASHBOARD =====
     @app.route('/dashboard')
     @login_required
     def dashboard():
-        # Buscar dados reais do banco
         hoje = date.today()
-        total_pacientes = Paciente.query.filter_by(ativo=True).count()
-        total_veiculos = Veiculo.query.filter_by(ativo=True).count()
-        total_motoristas = Motorista.query.filter_by(status='ativo').count()
-        agendamentos_hoje = Agendamento.query.filter_by(data=hoje).count()
-        
-        # Agendamentos de hoje para exibir
-        agendamentos_lista = Agendamento.query.filter_by(data=hoje).order_by(Agendamento.hora).all()
-        
-        # Preparar dados para JavaScript
-        agendamentos_js_data = []
-        for ag in agendamentos_lista:
-            status_class = {
-                'confirmado': 'success',
-                'agendado': 'warning', 
-                'em_andamento': 'primary',
-                'concluido': 'secondary'
-            }.get(ag.status, 'secondary')
-            
-            agendamentos_js_data.append({
-                'id': ag.id,
-                'horario_saida': ag.hora.strftime('%H:%M'),
-                'paciente_nome': escape_js_string(ag.paciente.nome),
-                'paciente_telefone': escape_js_string(ag.paciente.telefone),
-                'destino_nome': escape_js_string(ag.destino[:50]),
-                'status': ag.status,
-                'status_nome': escape_js_string(ag.status.replace('_', ' ').title()),
-                'status_class': status_class
-            })
         
-        # Converter para JSON seguro
-        agendamentos_json = json.dumps(agendamentos_js_data)
-        
-        return f'''
-        <!DOCTYPE html>
-        <html lang="pt-BR">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Dashboard - Sistema de Transporte</title>
-            
-            <!-- Bootstrap 5 -->
-            <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-            <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.0/font/bootstrap-icons.css" rel="stylesheet">
-            
-            <style>
-                :root {{
-                    --primary-color: #4fc9c4;
-                    --primary-dark: #43aca7;
-                    --success-color: #28a745;
-                    --warning-color: #ffc107;
-                    --info-color: #17a2b8;
-                    --danger-color: #dc3545;
-                }}
-                
-                body {{
-                    background: #f8f9fa;
-                    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                }}
-                
-                .stats-card {{
-                    background: linear-gradient(135deg, #ffffff 0%, #f8f9fa 100%);
-                    border: none;
-                    border-radius: 1rem;
-                    box-shadow: 0 0.125rem 0.25rem rgba(0,0,0,0.075);
-                    transition: all 0.3s ease;
-                    position: relative;
-                    overflow: hidden;
-                    cursor: pointer;
-                }}
-                
-                .stats-card:hover {{
-                    transform: translateY(-5px);
-                    box-shadow: 0 0.5rem 1rem rgba(0,0,0,0.15);
-                }}
-                
-                .stats-card::before {{
-                    content: '';
-                    position: absolute;
-                    top: 0;
-                    left: 0;
-                    right: 0;
-                    height: 4px;
-                }}
-                
-                .card-primary::before {{ background: var(--primary-color); }}
-                .card-success::before {{ background: var(--success-color); }}
-                .card-warning::before {{ background: var(--warning-color); }}
-                .card-info::before {{ background: var(--info-color); }}
-                
-                .stats-icon {{
-                    width: 60px;
-                    height: 60px;
-                    border-radius: 50%;
-                    display: flex;
-                    align-items: center;
-                    justify-content: center;
-                    font-size: 1.5rem;
-                    color: white;
-                    margin-bottom: 1rem;
-                }}
-                
-                .icon-primary {{ background: linear-gradient(135deg, var(--primary-color), #4a49c4); }}
-                .icon-success {{ background: linear-gradient(135deg, var(--success-color), #1e7e34); }}
-                .icon-warning {{ background: linear-gradient(135deg, var(--warning-color), #e0a800); }}
-                .icon-info {{ background: linear-gradient(135deg, var(--info-color), #138496); }}
-                
-                .stats-number {{
-                    font-size: 2.5rem;
-                    font-weight: 700;
-                    color: #333;
-                    margin: 0;
-                    line-height: 1;
-                }}
-                
-                .stats-label {{
-                    color: #6c757d;
-                    font-weight: 500;
-                    font-size: 0.875rem;
-                    margin-bottom: 0.5rem;
-                }}
-                
-                .quick-action {{
-                    background: white;
-                    border: 2px solid #e9ecef;
-                    border-radius: 0.75rem;
-                    padding: 1.5rem;
-                    text-decoration: none;
-                    color: #333;
-                    transition: all 0.3s ease;
-                    display: block;
-                    text-align: center;
-                }}
-                
-                .quick-action:hover {{
-                    border-color: var(--primary-color);
-                    transform: translateY(-3px);
-                    box-shadow: 0 0.25rem 0.5rem rgba(0,0,0,0.1);
-                    color: var(--primary-color);
-                    text-decoration: none;
-                }}
-                
-                .quick-action i {{
-                    font-size: 2rem;
-                    margin-bottom: 0.5rem;
-                    display: block;
-                    color: var(--primary-color);
-                }}
-                
-                .welcome-banner {{
-                    background: linear-gradient(135deg, var(--primary-color), #4a49c4);
-                    color: white;
-                    border-radius: 1rem;
-                    padding: 2rem;
-                    margin-bottom: 2rem;
-                    position: relative;
-                    overflow: hidden;
-                }}
-                
-                .schedule-item {{
-                    border: 1px solid #dee2e6;
-                    border-radius: 0.5rem;
-                    padding: 1rem;
-                    margin-bottom: 0.75rem;
-                    background: white;
-                    transition: all 0.3s ease;
-                }}
-                
-                .schedule-item:hover {{
-                    border-color: var(--primary-color);
-                    box-shadow: 0 0.125rem 0.25rem rgba(0,0,0,0.075);
-                }}
-                
-                .schedule-time {{
-                    font-weight: 600;
-                    color: var(--primary-color);
-                    font-size: 1.1rem;
-                }}
-                
-                .navbar {{
-                    background: linear-gradient(135deg, var(--primary-color), var(--primary-dark));
-                    border: none;
-                }}
-                
-                .navbar-brand, .nav-link {{
-                    color: white !important;
-                }}
-                
-                .fade-in-up {{
-                    animation: fadeInUp 0.6s ease-out;
-                }}
-                
-                @keyframes fadeInUp {{
-                    from {{
-                        opacity: 0;
-                        transform: translateY(20px);
-                    }}
-                    to {{
-                        opacity: 1;
-                        transform: translateY(0);
-                    }}
-                }}
-                
-                @media (max-width: 768px) {{
-                    .stats-number {{ font-size: 2rem; }}
-                    .stats-icon {{ width: 50px; height: 50px; font-size: 1.25rem; }}
-                    .welcome-banner {{ padding: 1.5rem; }}
-                }}
-            </style>
-        </head>
-        <body>
-            
-            <!-- Navbar -->
-            <nav class="navbar navbar-expand-lg">
-                <div class="container-fluid">
-                    <span class="navbar-brand">🚑 Sistema de Transporte de Pacientes</span>
-                    <div class="d-flex align-items-center text-white">
-                        <span class="me-3">Bem-vindo, {current_user.nome_completo}!</span>
-                        <a href="{url_for('logout')}" class="btn btn-outline-light btn-sm">Sair</a>
-                    </div>
-                </div>
-            </nav>
-            
-            <div class="container-fluid mt-4">
-                
-                <!-- Welcome Banner -->
-                <div class="welcome-banner fade-in-up">
-                    <div class="row align-items-center">
-                        <div class="col-md-8">
-                            <h1 class="h3 mb-2">{obter_saudacao()}</h1>
-                            <p class="mb-0 opacity-90">Sistema de Transporte de Pacientes - Cosmópolis/SP</p>
-                        </div>
-                        <div class="col-md-4 text-end">
-                            <span class="h4" id="currentTime">{datetime.now().strftime('%H:%M')}</span>
-                            <br><small class="opacity-75">Última atualização</small>
-                        </div>
-                    </div>
-                </div>
-                
-                <!-- Statistics Cards -->
-                <div class="row g-4 mb-4">
-                    <div class="col-xl-3 col-md-6">
-                        <div class="card stats-card card-primary fade-in-up" onclick="window.location.href='{url_for('agendamentos')}'">
-                            <div class="card-body">
-                                <div class="d-flex align-items-center">
-                                    <div class="stats-icon icon-primary">
-                                        <i class="bi bi-calendar-check"></i>
-                                    </div>
-                                    <div class="flex-grow-1">
-                                        <div class="stats-label">Agendamentos Hoje</div>
-                                        <div class="stats-number" id="agendamentosHoje">{agendamentos_hoje}</div>
-                                    </div>
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <div class="col-xl-3 col-md-6">
-                        <div class="card stats-card card-success fade-in-up" onclick="window.location.href='{url_for('pacientes')}'" style="animation-delay: 0.1s">
-                            <div class="card-body">
-                                <div class="d-flex align-items-center">
-                                    <div class="stats-icon icon-success">
-                                        <i class="bi bi-people"></i>
-                                    </div>
-                                    <div class="flex-grow-1">
-                                        <div class="stats-label">Pacientes Ativos</div>
-                                        <div class="stats-number" id="pacientesAtivos">{total_pacientes}</div>
-                                    </div>
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <div class="col-xl-3 col-md-6">
-                        <div class="card stats-card card-info fade-in-up" onclick="window.location.href='{url_for('motoristas')}'" style="animation-delay: 0.2s">
-                            <div class="card-body">
-                                <div class="d-flex align-items-center">
-                                    <div class="stats-icon icon-info">
-                                        <i class="bi bi-person-badge"></i>
-                                    </div>
-                                    <div class="flex-grow-1">
-                                        <div class="stats-label">Motoristas Disponíveis</div>
-                                        <div class="stats-number" id="motoristasDisponiveis">{total_motoristas}</div>
-                                    </div>
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <div class="col-xl-3 col-md-6">
-                        <div class="card stats-card card-warning fade-in-up" onclick="window.location.href='{url_for('veiculos')}'" style="animation-delay: 0.3s">
-                            <div class="card-body">
-                                <div class="d-flex align-items-center">
-                                    <div class="stats-icon icon-warning">
-                                        <i class="bi bi-truck"></i>
-                                    </div>
-                                    <div class="flex-grow-1">
-                                        <div class="stats-label">Veículos Disponíveis</div>
-                                        <div class="stats-number" id="veiculosDisponiveis">{total_veiculos}</div>
-                                    </div>
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-                
-                <div class="row g-4">
-                    <!-- Main Content -->
-                    <div class="col-xl-8">
-                        
-                        <!-- Quick Actions -->
-                        <div class="card mb-4 fade-in-up" style="animation-delay: 0.4s">
-                            <div class="card-header">
-                                <h5 class="card-title mb-0">
-                                    <i class="bi bi-lightning-fill me-2"></i>
-                                    Ações Rápidas
-                                </h5>
-                            </div>
-                            <div class="card-body">
-                                <div class="row g-3">
-                                    <div class="col-md-3 col-6">
-                                        <a href="{url_for('agendamentos_novo')}" class="quick-action">
-                                            <i class="bi bi-plus-circle"></i>
-                                            <div class="fw-semibold">Novo Agendamento</div>
-                                        </a>
-                                    </div>
-                                    <div class="col-md-3 col-6">
-                                        <a href="{url_for('pacientes_cadastrar')}" class="quick-action">
-                                            <i class="bi bi-person-plus"></i>
-                                            <div class="fw-semibold">Novo Paciente</div>
-                                        </a>
-                                    </div>
-                                    <div class="col-md-3 col-6">
-                                        <a href="{url_for('relatorios')}" class="quick-action">
-                                            <i class="bi bi-file-earmark-text"></i>
-                                            <div class="fw-semibold">Relatórios</div>
-                                        </a>
-                                    </div>
-                                    <div class="col-md-3 col-6">
-                                        <a href="#" class="quick-action" onclick="refreshDashboard(); return false;">
-                                            <i class="bi bi-arrow-clockwise"></i>
-                                            <div class="fw-semibold">Atualizar</div>
-                                        </a>
-                                    </div>
-                                </div>
-                            </div>
-                        </div>
-                        
-                        <!-- Today's Schedule -->
-                        <div class="card fade-in-up" style="animation-delay: 0.5s">
-                            <div class="card-header d-flex justify-content-between align-items-center">
-                                <h5 class="card-title mb-0">
-                                    <i class="bi bi-calendar-day me-2"></i>
-                                    Agendamentos de Hoje
-                                </h5>
-                                <a href="{url_for('agendamentos')}" class="btn btn-sm btn-outline-primary">Ver Todos</a>
-                            </div>
-                            <div class="card-body">
-                                <div id="todaySchedule">
-                                    <!-- Conteúdo será carregado via JavaScript -->
-                                </div>
-                            </div>
-                        </div>
-                        
-                    </div>
-                    
-                    <!-- Sidebar -->
-                    <div class="col-xl-4">
-                        
-                        <!-- Navigation Menu -->
-                        <div class="card mb-4 fade-in-up" style="animation-delay: 0.6s">
-                            <div class="card-header">
-                                <h5 class="card-title mb-0">
-                                    <i class="bi bi-list me-2"></i>
-                                    Menu Principal
-                                </h5>
-                            </div>
-                            <div class="list-group list-group-flush">
-                                <a href="{url_for('pacientes')}" class="list-group-item list-group-item-action">
-                                    <i class="bi bi-people me-2"></i>Pacientes
-                                </a>
-                                <a href="{url_for('veiculos')}" class="list-group-item list-group-item-action">
-                                    <i class="bi bi-truck me-2"></i>Veículos
-                                </a>
-                                <a href="{url_for('motoristas')}" class="list-group-item list-group-item-action">
-                                    <i class="bi bi-person-badge me-2"></i>Motoristas
-                                </a>
-                                <a href="{url_for('agendamentos')}" class="list-group-item list-group-item-action">
-                                    <i class="bi bi-calendar-event me-2"></i>Agendamentos
-                                </a>
-                                <a href="{url_for('relatorios')}" class="list-group-item list-group-item-action">
-                                    <i class="bi bi-file-earmark-text me-2"></i>Relatórios
-                                </a>
-                            </div>
-                        </div>
-                        
-                        <!-- System Status -->
-                        <div class="card fade-in-up" style="animation-delay: 0.7s">
-                            <div class="card-header">
-                                <h5 class="card-title mb-0">
-                                    <i class="bi bi-info-circle me-2"></i>
-                                    Status do Sistema
-                                </h5>
-                            </div>
-                            <div class="card-body">
-                                <div class="d-flex justify-content-between align-items-center mb-2">
-                                    <span>Sistema:</span>
-                                    <span class="badge bg-success">Online</span>
-                                </div>
-                                <div class="d-flex justify-content-between align-items-center mb-2">
-                                    <span>Banco de Dados:</span>
-                                    <span class="badge bg-success">Conectado</span>
-                                </div>
-                                <div class="d-flex justify-content-between align-items-center">
-                                    <span>Última Atualização:</span>
-                                    <span class="text-muted small" id="lastUpdate">{datetime.now().strftime('%H:%M:%S')}</span>
-                                </div>
-                            </div>
-                        </div>
-                        
-                    </div>
-                </div>
-                
-            </div>
-            
-            <!-- Scripts -->
-            <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
-            <script>
-                console.log('🚀 Dashboard carregado e pronto para atualizar!');
-                
-                // Dados iniciais dos agendamentos
-                var agendamentosIniciais = {agendamentos_json};
-                
-                // Atualizar relógio
-                function updateTime() {{
-                    const now = new Date();
-                    const timeString = now.toLocaleTimeString('pt-BR', {{ 
-                        hour: '2-digit', 
-                        minute: '2-digit' 
-                    }});
-                    const timeElement = document.getElementById('currentTime');
-                    const updateElement = document.getElementById('lastUpdate');
-                    
-                    if (timeElement) timeElement.textContent = timeString;
-                    if (updateElement) updateElement.textContent = now.toLocaleTimeString('pt-BR');
-                }}
-                
-                // Refresh automático dos dados
-                function refreshDashboard() {{
-                    console.log('🔄 Atualizando dashboard...');
-                    
-                    fetch('/dashboard_api')
-                        .then(response => {{
-                            console.log('📡 Resposta recebida:', response.status);
-                            if (!response.ok) {{
-                                throw new Error('HTTP error! status: ' + response.status);
-                            }}
-                            return response.json();
-                        }})
-                        .then(data => {{
-                            console.log('📊 Dados recebidos:', data);
-                            
-                            // Atualizar contadores com animação
-                            const stats = data.stats;
-                            if (stats) {{
-                                animateCounter('agendamentosHoje', stats.agendamentos_hoje);
-                                animateCounter('pacientesAtivos', stats.pacientes_ativos);
-                                animateCounter('motoristasDisponiveis', stats.motoristas_disponiveis);
-                                animateCounter('veiculosDisponiveis', stats.veiculos_disponiveis);
-                            }}
-                            
-                            // Atualizar agendamentos
-                            updateTodaySchedule(data.agendamentos_hoje);
-                            
-                            // Atualizar timestamp
-                            updateTime();
-                            
-                            console.log('✅ Dashboard atualizado com sucesso!');
-                        }})
-                        .catch(error => {{
-                            console.error('❌ Erro ao atualizar dashboard:', error);
-                        }});
-                }}
-                
-                // Animação dos contadores
-                function animateCounter(elementId, newValue) {{
-                    const element = document.getElementById(elementId);
-                    if (!element) return;
-                    
-                    const currentValue = parseInt(element.textContent) || 0;
-                    if (currentValue === newValue) return;
-                    
-                    const duration = 1000;
-                    const steps = 20;
-                    const stepTime = duration / steps;
-                    const stepValue = (newValue - currentValue) / steps;
-                    
-                    let step = 0;
-                    const timer = setInterval(function() {{
-                        step++;
-                        const value = Math.round(currentValue + (stepValue * step));
-                        element.textContent = value;
-                        
-                        if (step >= steps) {{
-                            clearInterval(timer);
-                            element.textContent = newValue;
-                        }}
-                    }}, stepTime);
-                }}
-                
-                function updateTodaySchedule(agendamentos) {{
-                    const container = document.getElementById('todaySchedule');
-                    if (!container) return;
-                    
-                    console.log('📅 Atualizando agendamentos:', agendamentos);
-                    
-                    if (!agendamentos || agendamentos.length === 0) {{
-                        container.innerHTML = '<div class="text-center py-4">' +
-                            '<i class="bi bi-calendar-x text-muted" style="font-size: 3rem;"></i>' +
-                            '<p class="text-muted mt-3 mb-0">Nenhum agendamento para hoje</p>' +
-                            '<a href="{url_for('agendamentos_novo')}" class="btn btn-primary mt-2">' +
-                            '<i class="bi bi-plus-circle me-1"></i> Criar Agendamento</a>' +
-                            '</div>';
-                        return;
-                    }}
-                    
-                    var html = '';
-                    agendamentos.forEach(function(ag) {{
-                        const statusClass = {{
-                            'confirmado': 'success',
-                            'agendado': 'warning',
-                            'em_andamento': 'primary',
-                            'concluido': 'secondary'
-                        }}[ag.status] || 'secondary';
-                        
-                        html += '<div class="schedule-item">' +
-                            '<div class="row align-items-center">' +
-                            '<div class="col-md-2">' +
-                            '<div class="schedule-time">' + ag.horario_saida + '</div>' +
-                            '</div>' +
-                            '<div class="col-md-4">' +
-                            '<div class="fw-semibold">' + ag.paciente_nome + '</div>' +
-                            '<div class="text-muted small">' + ag.paciente_telefone + '</div>' +
-                            '</div>' +
-                            '<div class="col-md-4">' +
-                            '<div class="text-muted small">' +
-                            '<strong>Destino:</strong><br>' + ag.destino_nome +
-                            '</div>' +
-                            '</div>' +
-                            '<div class="col-md-2">' +
-                            '<span class="badge bg-' + statusClass + '">' + ag.status_nome + '</span>' +
-                            '</div>' +
-                            '</div>' +
-                            '</div>';
-                    }});
-                    
-                    container.innerHTML = html;
-                }}
-                
-                // Inicializar
-                document.addEventListener('DOMContentLoaded', function() {{
-                    console.log('📱 DOM carregado - inicializando dashboard');
-                    
-                    // Carregar agendamentos iniciais
-                    updateTodaySchedule(agendamentosIniciais);
-                    
-                    // Atualizar a cada minuto
-                    updateTime();
-                    setInterval(updateTime, 60000);
-                    
-                    // Refresh automático a cada 2 minutos
-                    setInterval(refreshDashboard, 2 * 60 * 1000);
-                    
-                    // Primeira atualização após 3 segundos
-                    setTimeout(refreshDashboard, 3000);
-                    
-                    console.log('✅ Dashboard inicializado com sucesso!');
-                }});
-            </script>
-            
-        </body>
-        </html>
-        '''
+        # Enviado em partes: o navegador já recebe o <head> e a navbar; os totais e os agendamentos
+        # de hoje (em cache) só são lidos do banco quando o template chega aos cards e ao script
+        return stream_template(
+            'dashboard.html',
+            saudacao=obter_saudacao(),
+            carregar_estatisticas=lambda: obter_estatisticas_dashboard(hoje),
+            carregar_agendamentos_json=lambda: obter_agendamentos_dashboard_json(hoje)
+        )
     
     @app.route('/dashboard_api')
     @login_required
     def dashboard_api():
         try:
-            print("🔄 API Dashboard chamada!")
+            logger.debug("🔄 API Dashboard chamada!")
             
             # Buscar dados reais do banco
             hoje = date.today()
             
-            stats = {
-                'agendamentos_hoje': Agendamento.query.filter_by(data=hoje).count(),
-                'pacientes_ativos': Paciente.query.filter_by(ativo=True).count(),
-                'motoristas_disponiveis': Motorista.query.filter_by(status='ativo').count(),
-                'veiculos_disponiveis': Veiculo.query.filter_by(ativo=True).count()
-            }
-            
-            print(f"📊 Stats calculadas: {stats}")
-            
-            # Agendamentos de hoje
-            agendamentos_hoje = []
-            agendamentos = Agendamento.query.filter_by(data=hoje).order_by(Agendamento.hora).all()
+            # Mesmos dados para todos os usuários (cache de 30s, invalidado nos commits)
+            stats, agendamentos_hoje, etag = obter_dados_dashboard_api(hoje)
             
-            for ag in agendamentos:
-                agendamentos_hoje.append({
-                    'id': ag.id,
-                    'horario_saida': ag.hora.strftime('%H:%M'),
-                    'paciente_nome': ag.paciente.nome,
-                    'paciente_telefone': ag.paciente.telefone,
-                    'destino_nome': ag.destino[:50],
-                    'status': ag.status,
-                    'status_nome': ag.status.replace('_', ' ').title()
-                })
+            logger.debug("📊 Stats calculadas: %s", stats)
+            logger.debug("📅 Agendamentos encontrados: %d", len(agendamentos_hoje))
             
-            print(f"📅 Agendamentos encontrados: {len(agendamentos_hoje)}")
+            # Se nada mudou desde a última consulta do cliente, 304 sem corpo
+            if request.if_none_match.contains_weak(etag):
+                resposta = app.response_class(status=304)
+                resposta.set_etag(etag, weak=True)
+                return resposta
             
             response_data = {
                 'stats': stats,
@@ -1312,11 +1312,18 @@ def create_app():
                 'timestamp': datetime.now().isoformat()
             }
             
-            print("✅ API Dashboard respondendo com sucesso!")
-            return jsonify(response_data)
+            logger.debug("✅ API Dashboard respondendo com sucesso!")
+            resposta = jsonify(response_data)
+            resposta.set_etag(etag, weak=True)
+            # Dados do usuário logado: só o cache do navegador (private); depois de 30s ele ainda usa a cópia
+            # enquanto revalida em segundo plano, absorvendo as atualizações periódicas da página
+            resposta.cache_control.private = True
+            resposta.cache_control.max_age = 30
+            resposta.cache_control.stale_while_revalidate = 300
+            return resposta
             
         except Exception as e:
-            print(f"❌ Erro na API Dashboard: {e}")
+            logger.error("❌ Erro na API Dashboard: %s", e)
             return jsonify({'error': str(e)}), 500
     
     # ===== PACIENTES =====
@@ -1369,12 +1376,13 @@ def create_app():
         
         {pacientes_html}
         
-        {f'<div class="card"><div class="coming-soon"><div class="icon">👥</div><h3>Nenhum paciente cadastrado</h3><p>Comece cadastrando o primeiro paciente do sistema!</p></div></div>' if not pacientes_lista else ''}
+        {card_vazio('👥', 'Nenhum paciente cadastrado', 'Comece cadastrando o primeiro paciente do sistema!') if not pacientes_lista else ''}
         '''
         return gerar_layout_base("Pacientes", conteudo, "pacientes")
     
     @app.route('/pacientes/cadastrar', methods=['GET', 'POST'])
     @login_required
+    @cache.cached(timeout=300, key_prefix=chave_pagina_usuario, unless=pagina_nao_cacheavel)
     def pacientes_cadastrar():
         if request.method == 'POST':
             try:
@@ -1394,7 +1402,7 @@ def create_app():
                     return redirect(url_for('pacientes_cadastrar'))
                 
                 # Verificar se CPF já existe
-                if Paciente.query.filter_by(cpf=cpf).first():
+                if registro_existe(Paciente.cpf == cpf):
                     flash('CPF já cadastrado no sistema!', 'error')
                     return redirect(url_for('pacientes_cadastrar'))
                 
@@ -1404,99 +1412,26 @@ def create_app():
                 # Criar novo paciente
                 paciente = Paciente(
                     nome=nome,
-                    cpf=cpf,
-                    telefone=telefone,
-                    data_nascimento=data_nascimento,
-                    endereco=endereco,
-                    cep=cep if cep else None,
-                    cartao_sus=cartao_sus if cartao_sus else None,
-                    observacoes=observacoes if observacoes else None
-                )
-                
-                db.session.add(paciente)
-                db.session.commit()
-                
-                flash(f'Paciente "{nome}" cadastrado com sucesso!', 'success')
-                return redirect(url_for('pacientes'))
-                
-            except Exception as e:
-                db.session.rollback()
-                flash(f'Erro ao cadastrar paciente: {str(e)}', 'error')
-                print(f"❌ Erro ao cadastrar paciente: {e}")
-        
-        # Gerar alertas de mensagens flash
-        messages_html = ""
-        for category, message in get_flashed_messages(with_categories=True):
-            alert_class = f"alert-{category}"
-            messages_html += f'<div class="alert {alert_class}">{message}</div>'
-        
-        conteudo = f'''
-        <div class="breadcrumb">
-            <a href="{url_for('dashboard')}">Dashboard</a> > 
-            <a href="{url_for('pacientes')}">Pacientes</a> > 
-            Cadastrar Novo Paciente
-        </div>
-        
-        <div class="page-header">
-            <h2>📋 Cadastrar Novo Paciente</h2>
-            <p>Preencha os dados do paciente que será atendido pelo sistema de transporte</p>
-        </div>
-        
-        {messages_html}
-        
-        <div class="card">
-            <form method="POST">
-                <div class="form-row">
-                    <div class="form-group">
-                        <label for="nome">Nome Completo *</label>
-                        <input type="text" id="nome" name="nome" required>
-                    </div>
-                    <div class="form-group">
-                        <label for="cpf">CPF *</label>
-                        <input type="text" id="cpf" name="cpf" placeholder="000.000.000-00" required>
-                    </div>
-                </div>
-                
-                <div class="form-row">
-                    <div class="form-group">
-                        <label for="telefone">Telefone *</label>
-                        <input type="tel" id="telefone" name="telefone" placeholder="(00) 00000-0000" required>
-                    </div>
-                    <div class="form-group">
-                        <label for="data_nascimento">Data de Nascimento *</label>
-                        <input type="date" id="data_nascimento" name="data_nascimento" required>
-                    </div>
-                </div>
-                
-                <div class="form-group">
-                    <label for="endereco">Endereço Completo *</label>
-                    <input type="text" id="endereco" name="endereco" placeholder="Rua, número, bairro, cidade" required>
-                </div>
+                    cpf=cpf,
+                    telefone=telefone,
+                    data_nascimento=data_nascimento,
+                    endereco=endereco,
+                    cep=cep if cep else None,
+                    cartao_sus=cartao_sus if cartao_sus else None,
+                    observacoes=observacoes if observacoes else None
+                )
                 
-                <div class="form-row">
-                    <div class="form-group">
-                        <label for="cep">CEP</label>
-                        <input type="text" id="cep" name="cep" placeholder="00000-000">
-                    </div>
-                    <div class="form-group">
-                        <label for="cartao_sus">Cartão SUS</label>
-                        <input type="text" id="cartao_sus" name="cartao_sus" placeholder="000 0000 0000 0000">
-                    </div>
-                </div>
+                db.session.add(paciente)
+                db.session.commit()
                 
-                <div class="form-group">
-                    <label for="observacoes">Necessidades Especiais / Observações</label>
-                    <textarea id="observacoes" name="observacoes" rows="4" placeholder="Ex: Cadeirante, necessita maca, acompanhante, etc."></textarea>
-                </div>
+                return redirect(url_for('pacientes', cadastrado='paciente'))
                 
-                <div style="margin-top: 2rem;">
-                    <button type="submit" class="btn btn-success">💾 Salvar Paciente</button>
-                    <a href="{url_for('pacientes')}" class="btn btn-secondary" style="margin-left: 1rem;">❌ Cancelar</a>
-                </div>
-            </form>
-        </div>
-        '''
-        return gerar_layout_base("Cadastrar Paciente", conteudo, "pacientes")
+            except Exception as e:
+                db.session.rollback()
+                flash(f'Erro ao cadastrar paciente: {str(e)}', 'error')
+                logger.error("❌ Erro ao cadastrar paciente: %s", e)
+        
+        return render_template('pacientes_cadastrar.html', titulo='Cadastrar Paciente', ativo='pacientes')
     
     # ===== VEÍCULOS =====
     @app.route('/veiculos')
@@ -1550,12 +1485,13 @@ def create_app():
         
         {veiculos_html}
         
-        {f'<div class="card"><div class="coming-soon"><div class="icon">🚗</div><h3>Nenhum veículo cadastrado</h3><p>Comece cadastrando o primeiro veículo da frota!</p></div></div>' if not veiculos_lista else ''}
+        {card_vazio('🚗', 'Nenhum veículo cadastrado', 'Comece cadastrando o primeiro veículo da frota!') if not veiculos_lista else ''}
         '''
         return gerar_layout_base("Veículos", conteudo, "veiculos")
     
     @app.route('/veiculos/cadastrar', methods=['GET', 'POST'])
     @login_required
+    @cache.cached(timeout=300, key_prefix=chave_pagina_usuario, unless=pagina_nao_cacheavel)
     def veiculos_cadastrar():
         if request.method == 'POST':
             try:
@@ -1576,7 +1512,7 @@ def create_app():
                     return redirect(url_for('veiculos_cadastrar'))
                 
                 # Verificar se placa já existe
-                if Veiculo.query.filter_by(placa=placa).first():
+                if registro_existe(Veiculo.placa == placa):
                     flash('Placa já cadastrada no sistema!', 'error')
                     return redirect(url_for('veiculos_cadastrar'))
                 
@@ -1596,102 +1532,14 @@ def create_app():
                 db.session.add(veiculo)
                 db.session.commit()
                 
-                flash(f'Veículo "{placa}" cadastrado com sucesso!', 'success')
-                return redirect(url_for('veiculos'))
+                return redirect(url_for('veiculos', cadastrado='veiculo'))
                 
             except Exception as e:
                 db.session.rollback()
                 flash(f'Erro ao cadastrar veículo: {str(e)}', 'error')
-                print(f"❌ Erro ao cadastrar veículo: {e}")
-        
-        # Gerar alertas de mensagens flash
-        messages_html = ""
-        for category, message in get_flashed_messages(with_categories=True):
-            alert_class = f"alert-{category}"
-            messages_html += f'<div class="alert {alert_class}">{message}</div>'
-        
-        conteudo = f'''
-        <div class="breadcrumb">
-            <a href="{url_for('dashboard')}">Dashboard</a> > 
-            <a href="{url_for('veiculos')}">Veículos</a> > 
-            Cadastrar Novo Veículo
-        </div>
-        
-        <div class="page-header">
-            <h2>🚗 Cadastrar Novo Veículo</h2>
-            <p>Registre um novo veículo na frota municipal</p>
-        </div>
-        
-        {messages_html}
+                logger.error("❌ Erro ao cadastrar veículo: %s", e)
         
-        <div class="card">
-            <form method="POST">
-                <div class="form-row">
-                    <div class="form-group">
-                        <label for="placa">Placa *</label>
-                        <input type="text" id="placa" name="placa" placeholder="ABC-1234" required style="text-transform: uppercase;">
-                    </div>
-                    <div class="form-group">
-                        <label for="marca">Marca *</label>
-                        <input type="text" id="marca" name="marca" required>
-                    </div>
-                </div>
-                
-                <div class="form-row">
-                    <div class="form-group">
-                        <label for="modelo">Modelo *</label>
-                        <input type="text" id="modelo" name="modelo" required>
-                    </div>
-                    <div class="form-group">
-                        <label for="ano">Ano *</label>
-                        <input type="number" id="ano" name="ano" min="1980" max="2030" required>
-                    </div>
-                </div>
-                
-                <div class="form-row">
-                    <div class="form-group">
-                        <label for="cor">Cor</label>
-                        <input type="text" id="cor" name="cor">
-                    </div>
-                    <div class="form-group">
-                        <label for="tipo">Tipo de Veículo *</label>
-                        <select id="tipo" name="tipo" required>
-                            <option value="">Selecione...</option>
-                            <option value="ambulancia">Ambulância</option>
-                            <option value="van">Van</option>
-                            <option value="micro_onibus">Micro-ônibus</option>
-                            <option value="carro">Carro</option>
-                        </select>
-                    </div>
-                </div>
-                
-                <div class="form-row">
-                    <div class="form-group">
-                        <label for="capacidade">Capacidade de Passageiros</label>
-                        <input type="number" id="capacidade" name="capacidade" min="1" max="50">
-                    </div>
-                    <div class="form-group">
-                        <label for="adaptado">Adaptado para PCD</label>
-                        <select id="adaptado" name="adaptado">
-                            <option value="nao">Não</option>
-                            <option value="sim">Sim</option>
-                        </select>
-                    </div>
-                </div>
-                
-                <div class="form-group">
-                    <label for="observacoes">Observações</label>
-                    <textarea id="observacoes" name="observacoes" rows="3" placeholder="Equipamentos especiais, restrições, etc."></textarea>
-                </div>
-                
-                <div style="margin-top: 2rem;">
-                    <button type="submit" class="btn btn-success">💾 Salvar Veículo</button>
-                    <a href="{url_for('veiculos')}" class="btn btn-secondary" style="margin-left: 1rem;">❌ Cancelar</a>
-                </div>
-            </form>
-        </div>
-        '''
-        return gerar_layout_base("Cadastrar Veículo", conteudo, "veiculos")
+        return render_template('veiculos_cadastrar.html', titulo='Cadastrar Veículo', ativo='veiculos')
     
     # ===== MOTORISTAS =====
     @app.route('/motoristas')
@@ -1752,12 +1600,13 @@ def create_app():
         
         {motoristas_html}
         
-        {f'<div class="card"><div class="coming-soon"><div class="icon">👨‍💼</div><h3>Nenhum motorista cadastrado</h3><p>Comece cadastrando o primeiro motorista!</p></div></div>' if not motoristas_lista else ''}
+        {card_vazio('👨‍💼', 'Nenhum motorista cadastrado', 'Comece cadastrando o primeiro motorista!') if not motoristas_lista else ''}
         '''
         return gerar_layout_base("Motoristas", conteudo, "motoristas")
     
     @app.route('/motoristas/cadastrar', methods=['GET', 'POST'])
     @login_required
+    @cache.cached(timeout=300, key_prefix=chave_pagina_usuario, unless=pagina_nao_cacheavel)
     def motoristas_cadastrar():
         if request.method == 'POST':
             try:
@@ -1779,11 +1628,11 @@ def create_app():
                     return redirect(url_for('motoristas_cadastrar'))
                 
                 # Verificar se CPF ou CNH já existem
-                if Motorista.query.filter_by(cpf=cpf).first():
+                if registro_existe(Motorista.cpf == cpf):
                     flash('CPF já cadastrado no sistema!', 'error')
                     return redirect(url_for('motoristas_cadastrar'))
                 
-                if Motorista.query.filter_by(cnh=cnh).first():
+                if registro_existe(Motorista.cnh == cnh):
                     flash('CNH já cadastrada no sistema!', 'error')
                     return redirect(url_for('motoristas_cadastrar'))
                 
@@ -1808,174 +1657,32 @@ def create_app():
                 db.session.add(motorista)
                 db.session.commit()
                 
-                flash(f'Motorista "{nome}" cadastrado com sucesso!', 'success')
-                return redirect(url_for('motoristas'))
+                return redirect(url_for('motoristas', cadastrado='motorista'))
                 
             except Exception as e:
                 db.session.rollback()
                 flash(f'Erro ao cadastrar motorista: {str(e)}', 'error')
-                print(f"❌ Erro ao cadastrar motorista: {e}")
-        
-        # Gerar alertas de mensagens flash
-        messages_html = ""
-        for category, message in get_flashed_messages(with_categories=True):
-            alert_class = f"alert-{category}"
-            messages_html += f'<div class="alert {alert_class}">{message}</div>'
-        
-        conteudo = f'''
-        <div class="breadcrumb">
-            <a href="{url_for('dashboard')}">Dashboard</a> > 
-            <a href="{url_for('motoristas')}">Motoristas</a> > 
-            Cadastrar Novo Motorista
-        </div>
+                logger.error("❌ Erro ao cadastrar motorista: %s", e)
         
-        <div class="page-header">
-            <h2>👨‍💼 Cadastrar Novo Motorista</h2>
-            <p>Registre um novo motorista no sistema</p>
-        </div>
-        
-        {messages_html}
-        
-        <div class="card">
-            <form method="POST">
-                <div class="form-row">
-                    <div class="form-group">
-                        <label for="nome">Nome Completo *</label>
-                        <input type="text" id="nome" name="nome" required>
-                    </div>
-                    <div class="form-group">
-                        <label for="cpf">CPF *</label>
-                        <input type="text" id="cpf" name="cpf" placeholder="000.000.000-00" required>
-                    </div>
-                </div>
-                
-                <div class="form-row">
-                    <div class="form-group">
-                        <label for="telefone">Telefone *</label>
-                        <input type="tel" id="telefone" name="telefone" placeholder="(00) 00000-0000" required>
-                    </div>
-                    <div class="form-group">
-                        <label for="data_nascimento">Data de Nascimento *</label>
-                        <input type="date" id="data_nascimento" name="data_nascimento" required>
-                    </div>
-                </div>
-                
-                <div class="form-row">
-                    <div class="form-group">
-                        <label for="cnh">Número da CNH *</label>
-                        <input type="text" id="cnh" name="cnh" required>
-                    </div>
-                    <div class="form-group">
-                        <label for="categoria_cnh">Categoria CNH *</label>
-                        <select id="categoria_cnh" name="categoria_cnh" required>
-                            <option value="">Selecione...</option>
-                            <option value="A">A - Motocicleta</option>
-                            <option value="B">B - Carro</option>
-                            <option value="C">C - Caminhão</option>
-                            <option value="D">D - Ônibus</option>
-                            <option value="E">E - Carreta</option>
-                        </select>
-                    </div>
-                </div>
-                
-                <div class="form-row">
-                    <div class="form-group">
-                        <label for="vencimento_cnh">Vencimento da CNH *</label>
-                        <input type="date" id="vencimento_cnh" name="vencimento_cnh" required>
-                    </div>
-                    <div class="form-group">
-                        <label for="status">Status *</label>
-                        <select id="status" name="status" required>
-                            <option value="ativo">Ativo</option>
-                            <option value="inativo">Inativo</option>
-                            <option value="ferias">Férias</option>
-                            <option value="licenca">Licença</option>
-                        </select>
-                    </div>
-                </div>
-                
-                <div class="form-group">
-                    <label for="endereco">Endereço Completo</label>
-                    <input type="text" id="endereco" name="endereco">
-                </div>
-                
-                <div class="form-group">
-                    <label for="observacoes">Observações</label>
-                    <textarea id="observacoes" name="observacoes" rows="3" placeholder="Especializações, restrições, etc."></textarea>
-                </div>
-                
-                <div style="margin-top: 2rem;">
-                    <button type="submit" class="btn btn-success">💾 Salvar Motorista</button>
-                    <a href="{url_for('motoristas')}" class="btn btn-secondary" style="margin-left: 1rem;">❌ Cancelar</a>
-                </div>
-            </form>
-        </div>
-        '''
-        return gerar_layout_base("Cadastrar Motorista", conteudo, "motoristas")
+        return render_template('motoristas_cadastrar.html', titulo='Cadastrar Motorista', ativo='motoristas')
     
     # ===== AGENDAMENTOS =====
     @app.route('/agendamentos')
     @login_required
     def agendamentos():
-        agendamentos_lista = Agendamento.query.order_by(Agendamento.data.desc(), Agendamento.hora.desc()).all()
-        
-        agendamentos_html = ""
-        if agendamentos_lista:
-            agendamentos_html = '''
-            <div class="card">
-                <h3 style="color: var(--primary-color); margin-bottom: 1rem;">📅 Agendamentos</h3>
-                <div style="overflow-x: auto;">
-                    <table style="width: 100%; border-collapse: collapse;">
-                        <thead>
-                            <tr style="background: var(--color-95);">
-                                <th style="padding: 0.75rem; text-align: left; border-bottom: 2px solid var(--primary-color);">Data/Hora</th>
-                                <th style="padding: 0.75rem; text-align: left; border-bottom: 2px solid var(--primary-color);">Paciente</th>
-                                <th style="padding: 0.75rem; text-align: left; border-bottom: 2px solid var(--primary-color);">Tipo</th>
-                                <th style="padding: 0.75rem; text-align: left; border-bottom: 2px solid var(--primary-color);">Origem → Destino</th>
-                                <th style="padding: 0.75rem; text-align: left; border-bottom: 2px solid var(--primary-color);">Status</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-            '''
-            for agendamento in agendamentos_lista:
-                status_color = {
-                    'agendado': 'color: var(--warning-color);',
-                    'confirmado': 'color: var(--info-color);',
-                    'em_andamento': 'color: var(--primary-color);',
-                    'concluido': 'color: var(--success-color);',
-                    'cancelado': 'color: var(--danger-color);'
-                }.get(agendamento.status, '')
-                
-                agendamentos_html += f'''
-                            <tr>
-                                <td style="padding: 0.75rem; border-bottom: 1px solid var(--border-color);">{agendamento.data.strftime('%d/%m/%Y')} às {agendamento.hora.strftime('%H:%M')}</td>
-                                <td style="padding: 0.75rem; border-bottom: 1px solid var(--border-color);">{agendamento.paciente.nome}</td>
-                                <td style="padding: 0.75rem; border-bottom: 1px solid var(--border-color);">{agendamento.tipo_transporte.title()}</td>
-                                <td style="padding: 0.75rem; border-bottom: 1px solid var(--border-color); font-size: 0.875rem;">{agendamento.origem[:30]}{'...' if len(agendamento.origem) > 30 else ''} → {agendamento.destino[:30]}{'...' if len(agendamento.destino) > 30 else ''}</td>
-                                <td style="padding: 0.75rem; border-bottom: 1px solid var(--border-color); {status_color}">{agendamento.status.replace('_', ' ').title()}</td>
-                            </tr>
-                '''
-            agendamentos_html += '''
-                        </tbody>
-                    </table>
-                </div>
-            </div>
-            '''
-        
-        conteudo = f'''
-        <div class="page-header">
-            <h2>📅 Gerenciamento de Agendamentos</h2>
-            <p>Programação e controle de transportes de pacientes</p>
-            <div style="margin-top: 1rem;">
-                <a href="{url_for('agendamentos_novo')}" class="btn">📅 Novo Agendamento</a>
-            </div>
-        </div>
-        
-        {agendamentos_html}
+        agendamentos_lista = (
+            Agendamento.query.options(joinedload(Agendamento.paciente))
+            .order_by(Agendamento.data.desc(), Agendamento.hora.desc()).all()
+        )
         
-        {f'<div class="card"><div class="coming-soon"><div class="icon">📅</div><h3>Nenhum agendamento criado</h3><p>Comece criando o primeiro agendamento!</p></div></div>' if not agendamentos_lista else ''}
-        '''
-        return gerar_layout_base("Agendamentos", conteudo, "agendamentos")
+        # Linhas geradas pelo macro linha_agendamento do template (laço compilado pelo Jinja)
+        return render_template(
+            'agendamentos.html',
+            titulo='Agendamentos',
+            ativo='agendamentos',
+            agendamentos=agendamentos_lista,
+            cores_status=COR_STATUS_AGENDAMENTO
+        )
     
     @app.route('/agendamentos/novo', methods=['GET', 'POST'])
     @login_required
@@ -2018,130 +1725,28 @@ def create_app():
                 db.session.add(agendamento)
                 db.session.commit()
                 
-                print(f"✅ Agendamento criado: {agendamento.id} para {data} às {hora}")
-                flash('Agendamento criado com sucesso!', 'success')
-                return redirect(url_for('agendamentos'))
+                logger.info("✅ Agendamento criado: %s para %s às %s", agendamento.id, data, hora)
+                return redirect(url_for('agendamentos', cadastrado='agendamento'))
                 
             except Exception as e:
                 db.session.rollback()
                 flash(f'Erro ao criar agendamento: {str(e)}', 'error')
-                print(f"❌ Erro ao criar agendamento: {e}")
+                logger.error("❌ Erro ao criar agendamento: %s", e)
         
         # Buscar dados para os selects
         pacientes = Paciente.query.filter_by(ativo=True).order_by(Paciente.nome).all()
         veiculos = Veiculo.query.filter_by(ativo=True).order_by(Veiculo.placa).all()
         motoristas = Motorista.query.filter_by(status='ativo').order_by(Motorista.nome).all()
         
-        # Gerar options para os selects
-        pacientes_options = ""
-        for p in pacientes:
-            pacientes_options += f'<option value="{p.id}">{p.nome} - CPF: {p.cpf}</option>'
-        
-        veiculos_options = ""
-        for v in veiculos:
-            veiculos_options += f'<option value="{v.id}">{v.marca} {v.modelo} - {v.placa}</option>'
-        
-        motoristas_options = ""
-        for m in motoristas:
-            motoristas_options += f'<option value="{m.id}">{m.nome} - CNH: {m.categoria_cnh}</option>'
-        
-        # Gerar alertas de mensagens flash
-        messages_html = ""
-        for category, message in get_flashed_messages(with_categories=True):
-            alert_class = f"alert-{category}"
-            messages_html += f'<div class="alert {alert_class}">{message}</div>'
-        
-        # Data de hoje no formato YYYY-MM-DD
-        hoje = date.today().strftime('%Y-%m-%d')
-        
-        conteudo = f'''
-        <div class="breadcrumb">
-            <a href="{url_for('dashboard')}">Dashboard</a> > 
-            <a href="{url_for('agendamentos')}">Agendamentos</a> > 
-            Novo Agendamento
-        </div>
-        
-        <div class="page-header">
-            <h2>📅 Novo Agendamento</h2>
-            <p>Agende um novo transporte de paciente</p>
-        </div>
-        
-        {messages_html}
-        
-        <div class="card">
-            <form method="POST">
-                <div class="form-row">
-                    <div class="form-group">
-                        <label for="paciente_id">Paciente *</label>
-                        <select id="paciente_id" name="paciente_id" required>
-                            <option value="">Selecione o paciente...</option>
-                            {pacientes_options}
-                        </select>
-                    </div>
-                    <div class="form-group">
-                        <label for="tipo_transporte">Tipo de Transporte *</label>
-                        <select id="tipo_transporte" name="tipo_transporte" required>
-                            <option value="">Selecione...</option>
-                            <option value="consulta">Consulta Médica</option>
-                            <option value="exame">Exame</option>
-                            <option value="cirurgia">Cirurgia</option>
-                            <option value="tratamento">Tratamento</option>
-                            <option value="emergencia">Emergência</option>
-                        </select>
-                    </div>
-                </div>
-                
-                <div class="form-row">
-                    <div class="form-group">
-                        <label for="data">Data *</label>
-                        <input type="date" id="data" name="data" value="{hoje}" required>
-                    </div>
-                    <div class="form-group">
-                        <label for="hora">Hora *</label>
-                        <input type="time" id="hora" name="hora" required>
-                    </div>
-                </div>
-                
-                <div class="form-group">
-                    <label for="origem">Endereço de Origem *</label>
-                    <input type="text" id="origem" name="origem" placeholder="De onde o paciente será buscado" required>
-                </div>
-                
-                <div class="form-group">
-                    <label for="destino">Endereço de Destino *</label>
-                    <input type="text" id="destino" name="destino" placeholder="Para onde o paciente será levado" required>
-                </div>
-                
-                <div class="form-row">
-                    <div class="form-group">
-                        <label for="veiculo_id">Veículo</label>
-                        <select id="veiculo_id" name="veiculo_id">
-                            <option value="">Sistema escolherá automaticamente</option>
-                            {veiculos_options}
-                        </select>
-                    </div>
-                    <div class="form-group">
-                        <label for="motorista_id">Motorista</label>
-                        <select id="motorista_id" name="motorista_id">
-                            <option value="">Sistema escolherá automaticamente</option>
-                            {motoristas_options}
-                        </select>
-                    </div>
-                </div>
-                
-                <div class="form-group">
-                    <label for="observacoes">Observações</label>
-                    <textarea id="observacoes" name="observacoes" rows="3" placeholder="Informações adicionais sobre o transporte"></textarea>
-                </div>
-                
-                <div style="margin-top: 2rem;">
-                    <button type="submit" class="btn btn-success">📅 Agendar Transporte</button>
-                    <a href="{url_for('agendamentos')}" class="btn btn-secondary" style="margin-left: 1rem;">❌ Cancelar</a>
-                </div>
-            </form>
-        </div>
-        '''
-        return gerar_layout_base("Novo Agendamento", conteudo, "agendamentos")
+        return render_template(
+            'agendamentos_novo.html',
+            titulo='Novo Agendamento',
+            ativo='agendamentos',
+            pacientes=pacientes,
+            veiculos=veiculos,
+            motoristas=motoristas,
+            hoje=date.today().strftime('%Y-%m-%d')
+        )
     
     # ===== RELATÓRIOS =====
     @app.route('/relatorios')
@@ -2169,8 +1774,9 @@ def create_app():
         try:
             # Relatório de Pacientes
             pacientes = Paciente.query.filter_by(ativo=True).order_by(Paciente.nome).all()
+            agendamentos_por_paciente = contar_agendamentos_por(Agendamento.paciente_id)
             for p in pacientes:
-                total_agendamentos = Agendamento.query.filter_by(paciente_id=p.id).count()
+                total_agendamentos = agendamentos_por_paciente.get(p.id, 0)
                 pacientes_dados.append({
                     'nome': p.nome,
                     'cpf': p.cpf,
@@ -2184,8 +1790,9 @@ def create_app():
             
             # Relatório de Veículos
             veiculos = Veiculo.query.filter_by(ativo=True).order_by(Veiculo.placa).all()
+            agendamentos_por_veiculo = contar_agendamentos_por(Agendamento.veiculo_id)
             for v in veiculos:
-                total_agendamentos = Agendamento.query.filter_by(veiculo_id=v.id).count()
+                total_agendamentos = agendamentos_por_veiculo.get(v.id, 0)
                 veiculos_dados.append({
                     'placa': v.placa,
                     'marca_modelo': f"{v.marca} {v.modelo}",
@@ -2199,8 +1806,9 @@ def create_app():
             
             # Relatório de Motoristas
             motoristas = Motorista.query.order_by(Motorista.nome).all()
+            agendamentos_por_motorista = contar_agendamentos_por(Agendamento.motorista_id)
             for m in motoristas:
-                total_agendamentos = Agendamento.query.filter_by(motorista_id=m.id).count()
+                total_agendamentos = agendamentos_por_motorista.get(m.id, 0)
                 # Verificar se CNH está vencida
                 cnh_status = 'Válida'
                 if m.vencimento_cnh < date.today():
@@ -2221,7 +1829,11 @@ def create_app():
                 })
             
             # Relatório de Agendamentos
-            query = Agendamento.query
+            query = Agendamento.query.options(
+                joinedload(Agendamento.paciente),
+                joinedload(Agendamento.veiculo),
+                joinedload(Agendamento.motorista)
+            )
             if data_inicio and data_fim:
                 query = query.filter(Agendamento.data.between(data_inicio, data_fim))
             if status_filtro:
@@ -2258,7 +1870,7 @@ def create_app():
                 })
             
         except Exception as e:
-            print(f"❌ Erro ao gerar relatórios: {e}")
+            logger.error("❌ Erro ao gerar relatórios: %s", e)
             flash('Erro ao carregar dados dos relatórios.', 'error')
         
         conteudo = f'''
@@ -2532,16 +2144,18 @@ def create_app():
     @app.route('/logout')
     @login_required
     def logout():
+        invalidar_cache_usuario(current_user.id)
+        invalidar_senha_verificada(current_user.id)
         logout_user()
-        session.pop('_flashes', None)
-        flash('Logout realizado com sucesso!', 'success')
-        return redirect(url_for('login'))
+        # Sessão zerada de uma vez (sem ler e regravar a fila de mensagens); o aviso de saída vai pela URL
+        session.clear()
+        return redirect(url_for('login', saiu=1))
     
     # ===== GERENCIAMENTO DE USUÁRIOS =====
     @app.route('/usuarios')
     @login_required
     def usuarios():
-        if not current_user.tipo_usuario == 'administrador':
+        if not permissoes_usuario()['administrador']:
             flash('Acesso negado! Apenas administradores podem gerenciar usuários.', 'error')
             return redirect(url_for('dashboard'))
         
@@ -2603,7 +2217,7 @@ def create_app():
     @app.route('/usuarios/novo', methods=['GET', 'POST'])
     @login_required  
     def usuarios_novo():
-        if not current_user.tipo_usuario == 'administrador':
+        if not permissoes_usuario()['administrador']:
             flash('Acesso negado!', 'error')
             return redirect(url_for('dashboard'))
         
@@ -2619,7 +2233,7 @@ def create_app():
                     flash('Preencha todos os campos obrigatórios!', 'error')
                     return redirect(url_for('usuarios_novo'))
                 
-                if Usuario.query.filter_by(username=username).first():
+                if registro_existe(Usuario.username == username):
                     flash('Nome de usuário já existe!', 'error')
                     return redirect(url_for('usuarios_novo'))
                 
@@ -2704,7 +2318,7 @@ def create_app():
     @finance_view_required
     def faturamento():
         # Buscar faturas existentes
-        faturas = FaturaTerceirizado.query.order_by(
+        faturas = FaturaTerceirizado.query.options(joinedload(FaturaTerceirizado.veiculo)).order_by(
             FaturaTerceirizado.ano_referencia.desc(),
             FaturaTerceirizado.mes_referencia.desc()
         ).all()
@@ -2850,16 +2464,19 @@ def create_app():
                 ultimo_dia_num = monthrange(ano_referencia, mes_referencia)[1]
                 ultimo_dia = date(ano_referencia, mes_referencia, ultimo_dia_num)
                 
-                usos = UsoVeiculo.query.filter(
-                    UsoVeiculo.veiculo_id == veiculo_id,
-                    UsoVeiculo.data_uso.between(primeiro_dia, ultimo_dia),
-                    UsoVeiculo.status == 'concluido'
-                ).all()
-                
-                # Calcular totais
-                total_km = sum([uso.km_rodados or 0 for uso in usos])
-                total_diarias = len(usos)
-                valor_total = sum([float(uso.valor_total or 0) for uso in usos])
+                # Totais somados pelo banco (valor_total já é gravado ao finalizar cada uso)
+                total_diarias, total_km, valor_total = db.session.execute(
+                    select(
+                        func.count(),
+                        func.coalesce(func.sum(UsoVeiculo.km_rodados), 0),
+                        func.coalesce(func.sum(UsoVeiculo.valor_total), 0)
+                    ).where(
+                        UsoVeiculo.veiculo_id == veiculo_id,
+                        UsoVeiculo.data_uso.between(primeiro_dia, ultimo_dia),
+                        UsoVeiculo.status == 'concluido'
+                    )
+                ).one()
+                valor_total = float(valor_total)
                 
                 # Converter data de vencimento
                 data_vencimento = None
@@ -2895,26 +2512,19 @@ def create_app():
         ).all()
         
         # Gerar options para veículos
-        veiculos_options = ""
-        for v in veiculos_terceirizados:
-            veiculos_options += f'<option value="{v.id}">{v.placa} - {v.proprietario_nome or "Proprietário não informado"}</option>'
+        veiculos_options = opcoes_html(
+            (v.id, f'{v.placa} - {v.proprietario_nome or "Proprietário não informado"}') for v in veiculos_terceirizados
+        )
         
         # Gerar options para meses
-        meses_options = ""
-        meses = [
-            (1, 'Janeiro'), (2, 'Fevereiro'), (3, 'Março'), (4, 'Abril'),
-            (5, 'Maio'), (6, 'Junho'), (7, 'Julho'), (8, 'Agosto'),
-            (9, 'Setembro'), (10, 'Outubro'), (11, 'Novembro'), (12, 'Dezembro')
-        ]
-        for num, nome in meses:
-            meses_options += f'<option value="{num}">{nome}</option>'
+        meses_options = OPCOES_SELECT['mes']
         
         # Gerar options para anos
         ano_atual = datetime.now().year
-        anos_options = ""
-        for ano in range(ano_atual - 2, ano_atual + 2):
-            selected = "selected" if ano == ano_atual else ""
-            anos_options += f'<option value="{ano}" {selected}>{ano}</option>'
+        anos_options = ''.join(
+            f'<option value="{ano}" {"selected" if ano == ano_atual else ""}>{ano}</option>'
+            for ano in range(ano_atual - 2, ano_atual + 2)
+        )
         
         # Gerar alertas de mensagens flash
         messages_html = ""
@@ -2992,7 +2602,7 @@ def create_app():
     @contador_required
     def faturamento_pagar(fatura_id):
         try:
-            fatura = FaturaTerceirizado.query.get_or_404(fatura_id)
+            fatura = db.get_or_404(FaturaTerceirizado, fatura_id)
             
             if fatura.status == 'pago':
                 flash('Esta fatura já foi marcada como paga!', 'warning')
@@ -3016,7 +2626,7 @@ def create_app():
     @login_required
     @finance_view_required
     def faturamento_detalhes(fatura_id):
-        fatura = FaturaTerceirizado.query.get_or_404(fatura_id)
+        fatura = db.get_or_404(FaturaTerceirizado, fatura_id)
         
         # Buscar usos relacionados à fatura
         usos = fatura.gerar_usos_periodo()
@@ -3135,12 +2745,22 @@ def create_app():
     @app.route('/uso-veiculos')
     @login_required
     def uso_veiculos():
+        # Veículo, motorista e paciente do agendamento vêm no mesmo SELECT (evita uma consulta por linha)
+        opcoes_listagem = (
+            joinedload(UsoVeiculo.veiculo),
+            joinedload(UsoVeiculo.motorista),
+            joinedload(UsoVeiculo.agendamento).joinedload(Agendamento.paciente)
+        )
+        
         # Buscar usos em andamento e recentes
-        usos_em_andamento = UsoVeiculo.query.filter_by(status='em_andamento').order_by(UsoVeiculo.data_uso.desc()).all()
+        usos_em_andamento = (
+            UsoVeiculo.query.options(*opcoes_listagem)
+            .filter_by(status='em_andamento').order_by(UsoVeiculo.data_uso.desc()).all()
+        )
         
         # Buscar usos concluídos dos últimos 30 dias
         data_limite = date.today() - timedelta(days=30)
-        usos_concluidos = UsoVeiculo.query.filter(
+        usos_concluidos = UsoVeiculo.query.options(*opcoes_listagem).filter(
             UsoVeiculo.status.in_(['concluido', 'cancelado']),
             UsoVeiculo.data_uso >= data_limite
         ).order_by(UsoVeiculo.data_uso.desc()).limit(50).all()
@@ -3344,7 +2964,7 @@ def create_app():
                 hora_saida = datetime.strptime(hora_saida, '%H:%M').time()
                 
                 # Buscar valores do veículo (se terceirizado)
-                veiculo = Veiculo.query.get(veiculo_id)
+                veiculo = db.session.get(Veiculo, veiculo_id)
                 valor_km = veiculo.valor_km if veiculo.tipo_propriedade == 'terceirizado' else None
                 valor_diaria = veiculo.valor_diaria if veiculo.tipo_propriedade == 'terceirizado' else None
                 
@@ -3375,7 +2995,7 @@ def create_app():
         
         # Buscar agendamentos de hoje sem uso registrado
         hoje = date.today()
-        agendamentos_disponiveis = Agendamento.query.filter(
+        agendamentos_disponiveis = Agendamento.query.options(joinedload(Agendamento.paciente)).filter(
             Agendamento.data == hoje,
             ~Agendamento.id.in_(
                 db.session.query(UsoVeiculo.agendamento_id).filter(UsoVeiculo.agendamento_id.isnot(None))
@@ -3393,17 +3013,13 @@ def create_app():
         motoristas_disponiveis = Motorista.query.filter_by(status='ativo').order_by(Motorista.nome).all()
         
         # Gerar options
-        agendamentos_options = ""
-        for ag in agendamentos_disponiveis:
-            agendamentos_options += f'<option value="{ag.id}" data-origem="{ag.origem}" data-destino="{ag.destino}">{ag.hora.strftime("%H:%M")} - {ag.paciente.nome} ({ag.tipo_transporte})</option>'
-        
-        veiculos_options = ""
-        for v in veiculos_disponiveis:
-            veiculos_options += f'<option value="{v.id}">{v.placa} - {v.marca} {v.modelo}</option>'
-        
-        motoristas_options = ""
-        for m in motoristas_disponiveis:
-            motoristas_options += f'<option value="{m.id}">{m.nome}</option>'
+        opcao_agendamento = Markup('<option value="{}" data-origem="{}" data-destino="{}">{} - {} ({})</option>')
+        agendamentos_options = Markup('').join(
+            opcao_agendamento.format(ag.id, ag.origem, ag.destino, ag.hora.strftime('%H:%M'), ag.paciente.nome, ag.tipo_transporte)
+            for ag in agendamentos_disponiveis
+        )
+        veiculos_options = opcoes_html((v.id, f'{v.placa} - {v.marca} {v.modelo}') for v in veiculos_disponiveis)
+        motoristas_options = opcoes_html((m.id, m.nome) for m in motoristas_disponiveis)
         
         # Gerar alertas de mensagens flash
         messages_html = ""
@@ -3512,7 +3128,7 @@ def create_app():
     @app.route('/uso-veiculos/finalizar/<int:uso_id>', methods=['GET', 'POST'])
     @login_required
     def uso_veiculos_finalizar(uso_id):
-        uso = UsoVeiculo.query.get_or_404(uso_id)
+        uso = db.get_or_404(UsoVeiculo, uso_id)
         
         if uso.status != 'em_andamento':
             flash('Este uso já foi finalizado!', 'warning')
@@ -3655,11 +3271,26 @@ if __name__ == '__main__':
     
     try:
         app = create_app()
+        # APP_INIT_DB=false quando o banco já foi preparado com "flask init-db"
+        if os.environ.get('APP_INIT_DB', 'True').lower() == 'true':
+            with app.app_context():
+                verificar_e_criar_banco()
         print("📱 Acesse: http://localhost:5010")
         print("🏥 Prefeitura Municipal de Cosmópolis")
         print("👤 Login: admin / admin123")
         print("📊 Sistema completo com saudação corrigida!")
-        app.run(debug=True, host='0.0.0.0', port=5010)
+        
+        if os.environ.get('FLASK_RELOAD') == '1':
+            # Recarrega o processo ao salvar arquivos (apenas desenvolvimento): servidor do Werkzeug com reloader
+            from werkzeug.serving import run_simple
+            run_simple('0.0.0.0', 5010, app, use_reloader=True, threaded=True)
+        else:
+            # Waitress em vez do servidor de desenvolvimento do Flask (multi-thread, com buffer de requisições)
+            from waitress import serve
+            
+            # Threads de atendimento (as views são síncronas; cada requisição simultânea ocupa uma)
+            threads = int(os.environ.get('WAITRESS_THREADS', '8'))
+            serve(app, host='0.0.0.0', port=5010, threads=threads, connection_limit=1000, channel_timeout=30)
     except Exception as e:
         print(f"❌ Erro ao iniciar aplicação: {e}")
         sys.exit(1)
\ No newline at end of file
@@ -2,7 +2,7 @@ import os
 import sys
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash
+import bcrypt
 
 # Configuração básica
 app = Flask(__name__)
@@ -15,6 +15,10 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 db = SQLAlchemy(app)
 
+def gerar_hash_senha(senha):
+    """Gera o hash bcrypt no mesmo formato usado pelo app.py"""
+    return bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt(rounds=12)).decode('utf-8')
+
 # Modelo do usuário
 class Usuario(db.Model):
     __tablename__ = 'usuarios'
@@ -39,7 +43,7 @@ def resetar_senha_admin():
                 print(f"📧 Email: {admin.email}")
                 
                 # Gerar novo hash
-                novo_hash = generate_password_hash('admin123')
+                novo_hash = gerar_hash_senha('admin123')
                 admin.password_hash = novo_hash
                 
                 db.session.commit()
@@ -53,7 +57,7 @@ def resetar_senha_admin():
                 # Criar novo usuário
                 admin = Usuario(
                     username='admin',
-                    password_hash=generate_password_hash('admin123'),
+                    password_hash=gerar_hash_senha('admin123'),
                     nome_completo='Administrador do Sistema',
                     email='admin@cosmopolis.sp.gov.br',
                     tipo_usuario='administrador',
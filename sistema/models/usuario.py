@@ -13,13 +13,18 @@ from datetime import datetime, date, timedelta
 from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Boolean
 from sqlalchemy.orm import validates
 from sqlalchemy.ext.hybrid import hybrid_property
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
 from flask_login import UserMixin
 import re
 import secrets
+import bcrypt
 
 from db.database import db
 
+# Mesmo esquema do app.py: bcrypt com custo fixo (cada +1 dobra o tempo de verificação).
+# Hashes antigos do Werkzeug (pbkdf2/scrypt) continuam válidos em check_password.
+BCRYPT_ROUNDS = 12
+
 class Usuario(UserMixin, db.Model):
     """
     Modelo de Usuário
@@ -252,12 +257,15 @@ class Usuario(UserMixin, db.Model):
         if not self._validar_complexidade_senha(senha):
             raise ValueError("Senha deve conter pelo menos uma letra maiúscula, uma minúscula e um número")
         
-        self.senha_hash = generate_password_hash(senha)
+        self.senha_hash = bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')
         self.data_troca_senha = datetime.utcnow()
         self.deve_trocar_senha = False
     
     def check_password(self, senha):
         """Verifica se a senha está correta"""
+        if self.senha_hash.startswith('$2'):
+            return bcrypt.checkpw(senha.encode('utf-8'), self.senha_hash.encode('utf-8'))
+        # Hash legado do Werkzeug (pbkdf2/scrypt)
         return check_password_hash(self.senha_hash, senha)
     
     def gerar_token_recuperacao(self):
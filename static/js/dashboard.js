@@ -0,0 +1,147 @@
+console.log('🚀 Dashboard carregado e pronto para atualizar!');
+
+// Atualizar relógio
+function updateTime() {
+    const now = new Date();
+    const timeString = now.toLocaleTimeString('pt-BR', { 
+        hour: '2-digit', 
+        minute: '2-digit' 
+    });
+    const timeElement = document.getElementById('currentTime');
+    const updateElement = document.getElementById('lastUpdate');
+
+    if (timeElement) timeElement.textContent = timeString;
+    if (updateElement) updateElement.textContent = now.toLocaleTimeString('pt-BR');
+}
+
+// Refresh automático dos dados
+function refreshDashboard() {
+    console.log('🔄 Atualizando dashboard...');
+
+    fetch('/dashboard_api')
+        .then(response => {
+            console.log('📡 Resposta recebida:', response.status);
+            if (!response.ok) {
+                throw new Error('HTTP error! status: ' + response.status);
+            }
+            return response.json();
+        })
+        .then(data => {
+            console.log('📊 Dados recebidos:', data);
+
+            // Atualizar contadores com animação
+            const stats = data.stats;
+            if (stats) {
+                animateCounter('agendamentosHoje', stats.agendamentos_hoje);
+                animateCounter('pacientesAtivos', stats.pacientes_ativos);
+                animateCounter('motoristasDisponiveis', stats.motoristas_disponiveis);
+                animateCounter('veiculosDisponiveis', stats.veiculos_disponiveis);
+            }
+
+            // Atualizar agendamentos
+            updateTodaySchedule(data.agendamentos_hoje);
+
+            // Atualizar timestamp
+            updateTime();
+
+            console.log('✅ Dashboard atualizado com sucesso!');
+        })
+        .catch(error => {
+            console.error('❌ Erro ao atualizar dashboard:', error);
+        });
+}
+
+// Animação dos contadores
+function animateCounter(elementId, newValue) {
+    const element = document.getElementById(elementId);
+    if (!element) return;
+
+    const currentValue = parseInt(element.textContent) || 0;
+    if (currentValue === newValue) return;
+
+    const duration = 1000;
+    const steps = 20;
+    const stepTime = duration / steps;
+    const stepValue = (newValue - currentValue) / steps;
+
+    let step = 0;
+    const timer = setInterval(function() {
+        step++;
+        const value = Math.round(currentValue + (stepValue * step));
+        element.textContent = value;
+
+        if (step >= steps) {
+            clearInterval(timer);
+            element.textContent = newValue;
+        }
+    }, stepTime);
+}
+
+function updateTodaySchedule(agendamentos) {
+    const container = document.getElementById('todaySchedule');
+    if (!container) return;
+
+    console.log('📅 Atualizando agendamentos:', agendamentos);
+
+    if (!agendamentos || agendamentos.length === 0) {
+        container.innerHTML = '<div class="text-center py-4">' +
+            '<i class="bi bi-calendar-x text-muted" style="font-size: 3rem;"></i>' +
+            '<p class="text-muted mt-3 mb-0">Nenhum agendamento para hoje</p>' +
+            '<a href="' + urlNovoAgendamento + '" class="btn btn-primary mt-2">' +
+            '<i class="bi bi-plus-circle me-1"></i> Criar Agendamento</a>' +
+            '</div>';
+        return;
+    }
+
+    var html = '';
+    agendamentos.forEach(function(ag) {
+        const statusClass = {
+            'confirmado': 'success',
+            'agendado': 'warning',
+            'em_andamento': 'primary',
+            'concluido': 'secondary'
+        }[ag.status] || 'secondary';
+
+        html += '<div class="schedule-item">' +
+            '<div class="row align-items-center">' +
+            '<div class="col-md-2">' +
+            '<div class="schedule-time">' + ag.horario_saida + '</div>' +
+            '</div>' +
+            '<div class="col-md-4">' +
+            '<div class="fw-semibold">' + ag.paciente_nome + '</div>' +
+            '<div class="text-muted small">' + ag.paciente_telefone + '</div>' +
+            '</div>' +
+            '<div class="col-md-4">' +
+            '<div class="text-muted small">' +
+            '<strong>Destino:</strong><br>' + ag.destino_nome +
+            '</div>' +
+            '</div>' +
+            '<div class="col-md-2">' +
+            '<span class="badge bg-' + statusClass + '">' + ag.status_nome + '</span>' +
+            '</div>' +
+            '</div>' +
+            '</div>';
+    });
+
+    container.innerHTML = html;
+}
+
+// Inicializar
+document.addEventListener('DOMContentLoaded', function() {
+    console.log('📱 DOM carregado - inicializando dashboard');
+
+    // Carregar agendamentos iniciais
+    updateTodaySchedule(agendamentosIniciais);
+
+    // Atualizar a cada minuto
+    updateTime();
+    setInterval(updateTime, 60000);
+
+    // Refresh automático a cada 2 minutos
+    setInterval(refreshDashboard, 2 * 60 * 1000);
+
+    // Primeira atualização após 3 segundos
+    setTimeout(refreshDashboard, 3000);
+
+    console.log('✅ Dashboard inicializado com sucesso!');
+});
@@ -0,0 +1,94 @@
+from contextlib import contextmanager
+from datetime import date, time
+
+import pytest
+from sqlalchemy import event
+
+import app as aplicacao
+from app import db, Usuario, Paciente, Veiculo, Motorista, Agendamento, UsoVeiculo
+
+# bcrypt no custo de produção é caro: o hash do admin é gerado uma vez para a sessão de testes
+_HASH_ADMIN = {}
+
+def hash_admin():
+    if 'admin123' not in _HASH_ADMIN:
+        _HASH_ADMIN['admin123'] = aplicacao.gerar_hash_senha('admin123')
+    return _HASH_ADMIN['admin123']
+
+@pytest.fixture
+def app(tmp_path):
+    """Aplicação com banco SQLite temporário, tabelas criadas e o admin padrão"""
+    app = aplicacao.create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'transporte_pacientes.db'}",
+    })
+    with app.app_context():
+        db.create_all()
+        db.session.add(Usuario(
+            username='admin',
+            nome_completo='Administrador do Sistema',
+            tipo_usuario='administrador',
+            password_hash=hash_admin(),
+        ))
+        db.session.commit()
+        aplicacao.recalcular_contadores()
+    
+    yield app
+    
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def fazer_login(client, username='admin', password='admin123'):
+    return client.post('/login', data={'username': username, 'password': password})
+
+@pytest.fixture
+def cliente_logado(client):
+    resposta = fazer_login(client)
+    assert resposta.status_code == 302
+    assert resposta.headers['Location'].endswith('/dashboard')
+    return client
+
+@contextmanager
+def contar_consultas(engine):
+    """Lista com os comandos SQL executados no engine enquanto o bloco roda"""
+    consultas = []
+    
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+    
+    event.listen(engine, 'before_cursor_execute', registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, 'before_cursor_execute', registrar)
+
+@pytest.fixture
+def dados_exemplo(app):
+    """Alguns registros relacionados em cada tabela (listagens com N+1 fariam uma consulta por linha)"""
+    with app.app_context():
+        for i in range(3):
+            paciente = Paciente(
+                nome=f'Paciente {i}', cpf=f'000.000.000-0{i}', telefone='(19) 99999-0000',
+                data_nascimento=date(1980, 1, i + 1), endereco=f'Rua {i}, 100',
+            )
+            veiculo = Veiculo(placa=f'ABC-000{i}', marca='Fiat', modelo='Doblò', ano=2020, tipo='van')
+            motorista = Motorista(
+                nome=f'Motorista {i}', cpf=f'111.111.111-1{i}', telefone='(19) 98888-0000',
+                data_nascimento=date(1975, 1, i + 1), cnh=f'0000000000{i}', categoria_cnh='D',
+                vencimento_cnh=date(2030, 1, 1),
+            )
+            agendamento = Agendamento(
+                paciente=paciente, veiculo=veiculo, motorista=motorista, tipo_transporte='consulta',
+                data=date.today(), hora=time(8 + i), origem='Cosmópolis', destino='Campinas',
+            )
+            uso = UsoVeiculo(
+                agendamento=agendamento, veiculo=veiculo, motorista=motorista, data_uso=date.today(),
+                hora_saida=time(8 + i), km_inicial=1000, endereco_origem='Cosmópolis', endereco_destino='Campinas',
+            )
+            db.session.add_all([paciente, veiculo, motorista, agendamento, uso])
+        db.session.commit()
@@ -0,0 +1,80 @@
+import pytest
+
+from app import db
+from conftest import contar_consultas
+
+# Listagens: uma consulta para as linhas (relações por join/selectin) e no máximo mais uma
+LISTAGENS = [
+    '/dashboard',
+    '/dashboard_api',
+    '/pacientes',
+    '/veiculos',
+    '/motoristas',
+    '/agendamentos',
+    '/usuarios',
+    '/uso-veiculos',
+    '/faturamento',
+]
+
+@pytest.mark.parametrize('caminho', LISTAGENS)
+def test_listagem_executa_no_maximo_duas_consultas(app, cliente_logado, dados_exemplo, caminho):
+    # Primeira requisição coloca o usuário logado no cache (não faz parte da listagem)
+    cliente_logado.get('/pacientes/cadastrar')
+    
+    with app.app_context(), contar_consultas(db.engine) as consultas:
+        resposta = cliente_logado.get(caminho)
+        resposta.get_data()  # o dashboard é enviado em streaming: as consultas rodam durante o corpo
+    
+    assert resposta.status_code == 200
+    assert len(consultas) <= 2, consultas
+
+def test_relatorios_nao_faz_uma_consulta_por_registro(app, cliente_logado, dados_exemplo):
+    cliente_logado.get('/pacientes/cadastrar')
+    
+    with app.app_context(), contar_consultas(db.engine) as consultas:
+        resposta = cliente_logado.get('/relatorios')
+    
+    assert resposta.status_code == 200
+    # pacientes, veículos, motoristas, agendamentos e usuários + um COUNT agrupado por cadastro
+    assert len(consultas) == 8, consultas
+
+def test_limite_ativo_por_padrao_nos_testes(app):
+    from app import LIMITE_CONSULTAS_DEBUG, limite_consultas_requisicao
+    
+    with app.test_request_context():
+        assert limite_consultas_requisicao() == LIMITE_CONSULTAS_DEBUG
+
+def test_estourar_o_limite_falha_a_requisicao(app, cliente_logado, dados_exemplo):
+    cliente_logado.get('/pacientes/cadastrar')
+    app.config['SQL_LIMITE_CONSULTAS'] = 1
+    
+    # agendamentos/novo consulta pacientes, veículos e motoristas
+    with pytest.raises(RuntimeError, match='provável N\\+1'):
+        cliente_logado.get('/agendamentos/novo')
+
+def test_limite_vale_para_o_corpo_em_streaming(app, cliente_logado, dados_exemplo):
+    cliente_logado.get('/pacientes/cadastrar')
+    app.config['SQL_LIMITE_CONSULTAS'] = 1
+    
+    # As duas consultas do dashboard só rodam quando o template em streaming chega aos cards
+    resposta = cliente_logado.get('/dashboard')
+    with pytest.raises(RuntimeError, match='provável N\\+1'):
+        resposta.get_data()
+
+def test_limite_estourado_dentro_de_try_da_view_nao_vira_resposta_normal(app, cliente_logado, dados_exemplo):
+    cliente_logado.get('/pacientes/cadastrar')
+    app.config['SQL_LIMITE_CONSULTAS'] = 2
+    
+    # relatorios captura Exception e mostra um flash: a verificação no after_request refaz o erro
+    with pytest.raises(RuntimeError, match='provável N\\+1'):
+        cliente_logado.get('/relatorios')
+
+def test_producao_so_registra_aviso(app, cliente_logado, dados_exemplo, caplog):
+    cliente_logado.get('/pacientes/cadastrar')
+    app.config['SQL_LIMITE_CONSULTAS'] = 1
+    app.testing = False
+    
+    resposta = cliente_logado.get('/agendamentos/novo')
+    
+    assert resposta.status_code == 200
+    assert 'provável N+1' in caplog.text
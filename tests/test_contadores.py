@@ -0,0 +1,162 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import delete, insert, select, update
+
+from app import (
+    db, cache, EstatisticaTabela, Paciente, Veiculo, Motorista,
+    obter_estatisticas_dashboard, recalcular_contadores,
+)
+
+def totais():
+    return dict(db.session.execute(select(EstatisticaTabela.tabela, EstatisticaTabela.total)).all())
+
+def novo_paciente(numero, ativo=True):
+    return Paciente(
+        nome=f'Paciente {numero}', cpf=f'222.222.222-{numero:02d}', telefone='(19) 97777-0000',
+        data_nascimento=date(1990, 1, 1), endereco='Rua A, 1', ativo=ativo,
+    )
+
+def novo_motorista(numero, status='ativo'):
+    return Motorista(
+        nome=f'Motorista {numero}', cpf=f'333.333.333-{numero:02d}', telefone='(19) 96666-0000',
+        data_nascimento=date(1970, 1, 1), cnh=f'9999999999{numero}', categoria_cnh='D',
+        vencimento_cnh=date(2030, 1, 1), status=status,
+    )
+
+@pytest.fixture
+def contexto(app):
+    with app.app_context():
+        yield
+
+def test_inserir_ativo_soma_e_inativo_nao(contexto):
+    db.session.add_all([novo_paciente(1), novo_paciente(2, ativo=False)])
+    db.session.add(Veiculo(placa='XYZ-0001', marca='Fiat', modelo='Uno', ano=2019, tipo='carro'))
+    db.session.add(novo_motorista(1, status='ferias'))
+    db.session.commit()
+    
+    assert totais() == {'pacientes': 1, 'veiculos': 1, 'motoristas': 0}
+
+def test_excluir_ativo_subtrai_e_inativo_nao(contexto):
+    ativo, inativo = novo_paciente(1), novo_paciente(2, ativo=False)
+    db.session.add_all([ativo, inativo])
+    db.session.commit()
+    
+    db.session.delete(inativo)
+    db.session.commit()
+    assert totais()['pacientes'] == 1
+    
+    db.session.delete(ativo)
+    db.session.commit()
+    assert totais()['pacientes'] == 0
+
+def test_alternar_ativo_e_inativo(contexto):
+    paciente = novo_paciente(1)
+    db.session.add(paciente)
+    db.session.commit()
+    
+    paciente.ativo = False
+    db.session.commit()
+    assert totais()['pacientes'] == 0
+    
+    paciente.ativo = True
+    db.session.commit()
+    assert totais()['pacientes'] == 1
+
+def test_alteracao_sem_mudar_o_estado_nao_altera_o_total(contexto):
+    paciente = novo_paciente(1)
+    db.session.add(paciente)
+    db.session.commit()
+    
+    paciente.ativo = True
+    paciente.nome = 'Outro nome'
+    db.session.commit()
+    
+    assert totais()['pacientes'] == 1
+
+def test_alteracao_de_atributo_expirado_usa_o_valor_anterior_do_banco(contexto):
+    # Após o commit os atributos expiram: o listener 'set' com active_history carrega o valor antigo
+    # antes da alteração, senão o after_update não teria com o que comparar
+    paciente = novo_paciente(1)
+    db.session.add(paciente)
+    db.session.commit()
+    db.session.expire(paciente)
+    
+    paciente.ativo = False
+    db.session.commit()
+    
+    assert totais()['pacientes'] == 0
+
+def test_status_do_motorista(contexto):
+    motorista = novo_motorista(1)
+    db.session.add(motorista)
+    db.session.commit()
+    assert totais()['motoristas'] == 1
+    
+    motorista.status = 'ferias'
+    db.session.commit()
+    assert totais()['motoristas'] == 0
+    
+    motorista.status = 'licenca'
+    db.session.commit()
+    assert totais()['motoristas'] == 0
+    
+    motorista.status = 'ativo'
+    db.session.commit()
+    assert totais()['motoristas'] == 1
+
+def test_rollback_descarta_o_ajuste(contexto):
+    db.session.add(novo_paciente(1))
+    db.session.flush()
+    db.session.rollback()
+    
+    assert totais()['pacientes'] == 0
+
+def test_contador_ausente_e_recalculado_na_leitura(contexto):
+    db.session.add_all([novo_paciente(1), novo_paciente(2), novo_paciente(3, ativo=False)])
+    db.session.commit()
+    db.session.execute(delete(EstatisticaTabela).where(EstatisticaTabela.tabela == 'pacientes'))
+    db.session.commit()
+    cache.delete_memoized(obter_estatisticas_dashboard)
+    
+    stats = obter_estatisticas_dashboard(date.today())
+    
+    assert stats['total_pacientes'] == 2
+    assert totais()['pacientes'] == 2
+
+def test_dashboard_reflete_o_commit_mesmo_em_cache(contexto):
+    hoje = date.today()
+    assert obter_estatisticas_dashboard(hoje)['total_pacientes'] == 0
+    
+    db.session.add(novo_paciente(1))
+    db.session.commit()
+    
+    assert obter_estatisticas_dashboard(hoje)['total_pacientes'] == 1
+
+def test_recalcular_corrige_escrita_fora_do_orm(contexto):
+    db.session.add(novo_paciente(1))
+    db.session.commit()
+    # SQL direto (como os scripts de manutenção com sqlite3) não passa pelos eventos
+    with db.engine.begin() as conexao:
+        conexao.exec_driver_sql('UPDATE pacientes SET ativo = 0')
+    assert totais()['pacientes'] == 1
+    
+    recalcular_contadores()
+    
+    assert totais()['pacientes'] == 0
+
+@pytest.mark.parametrize('comando', [
+    lambda: update(Paciente).values(ativo=False),
+    lambda: delete(Veiculo),
+    lambda: insert(Motorista).values(
+        nome='M', cpf='1', telefone='1', data_nascimento=date(1970, 1, 1), cnh='1',
+        categoria_cnh='B', vencimento_cnh=date(2030, 1, 1),
+    ),
+])
+def test_escrita_em_massa_nas_tabelas_contadas_e_recusada(contexto, comando):
+    with pytest.raises(RuntimeError, match='contadores do dashboard'):
+        db.session.execute(comando())
+
+def test_query_update_em_massa_e_recusado(contexto):
+    with pytest.raises(RuntimeError, match='contadores do dashboard'):
+        Paciente.query.filter_by(ativo=True).update({'ativo': False})
@@ -0,0 +1,100 @@
+import gzip
+import os
+
+import pytest
+
+from app import brotli, url_for
+
+CSS = b'body { color: #333; }\n' * 200
+
+@pytest.fixture
+def pasta_estatica(app, tmp_path):
+    """Pasta estática temporária (os testes alteram os arquivos)"""
+    pasta = tmp_path / 'static'
+    (pasta / 'css').mkdir(parents=True)
+    (pasta / 'css' / 'app.css').write_bytes(CSS)
+    (pasta / 'img').mkdir()
+    (pasta / 'img' / 'logo.svg').write_bytes(b'<svg></svg>')
+    app.static_folder = str(pasta)
+    return pasta
+
+def test_css_servido_pre_comprimido_em_gzip(client, pasta_estatica):
+    resposta = client.get('/static/css/app.css', headers={'Accept-Encoding': 'gzip'})
+    
+    assert resposta.status_code == 200
+    assert resposta.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in resposta.vary
+    assert resposta.headers['ETag'].endswith('-gzip"')
+    assert gzip.decompress(resposta.get_data()) == CSS
+
+@pytest.mark.skipif(brotli is None, reason='brotli não instalado')
+def test_brotli_tem_preferencia(client, pasta_estatica):
+    resposta = client.get('/static/css/app.css', headers={'Accept-Encoding': 'gzip, br'})
+    
+    assert resposta.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(resposta.get_data()) == CSS
+
+def test_etag_do_comprimido_responde_304(client, pasta_estatica):
+    primeira = client.get('/static/css/app.css', headers={'Accept-Encoding': 'gzip'})
+    
+    repetida = client.get('/static/css/app.css', headers={
+        'Accept-Encoding': 'gzip',
+        'If-None-Match': primeira.headers['ETag'],
+    })
+    
+    assert repetida.status_code == 304
+    assert repetida.get_data() == b''
+
+def test_arquivo_alterado_gera_outro_etag_e_outro_conteudo(client, pasta_estatica):
+    arquivo = pasta_estatica / 'css' / 'app.css'
+    primeira = client.get('/static/css/app.css', headers={'Accept-Encoding': 'gzip'})
+    
+    novo_css = CSS + b'a { color: red; }\n'
+    arquivo.write_bytes(novo_css)
+    estado = arquivo.stat()
+    os.utime(arquivo, ns=(estado.st_atime_ns, estado.st_mtime_ns + 1_000_000_000))
+    resposta = client.get('/static/css/app.css', headers={
+        'Accept-Encoding': 'gzip',
+        'If-None-Match': primeira.headers['ETag'],
+    })
+    
+    assert resposta.status_code == 200
+    assert resposta.headers['ETag'] != primeira.headers['ETag']
+    assert gzip.decompress(resposta.get_data()) == novo_css
+
+def test_sem_accept_encoding_segue_o_envio_normal(client, pasta_estatica):
+    resposta = client.get('/static/css/app.css')
+    
+    assert resposta.status_code == 200
+    assert 'Content-Encoding' not in resposta.headers
+    assert resposta.get_data() == CSS
+
+def test_tipo_nao_pre_comprimido_segue_o_envio_normal(client, pasta_estatica):
+    resposta = client.get('/static/img/logo.svg', headers={'Accept-Encoding': 'gzip'})
+    
+    assert resposta.status_code == 200
+    assert resposta.get_data() == b'<svg></svg>'
+
+def test_caminho_fora_da_pasta_estatica(client, pasta_estatica):
+    resposta = client.get('/static/../app.py', headers={'Accept-Encoding': 'gzip'})
+    
+    assert resposta.status_code == 404
+
+def test_url_versionada_acompanha_o_conteudo(app, pasta_estatica):
+    arquivo = pasta_estatica / 'css' / 'app.css'
+    with app.test_request_context():
+        antes = url_for('static', filename='css/app.css')
+        arquivo.write_bytes(CSS + b'/* alterado */\n')
+        estado = arquivo.stat()
+        os.utime(arquivo, ns=(estado.st_atime_ns, estado.st_mtime_ns + 1_000_000_000))
+        depois = url_for('static', filename='css/app.css')
+    
+    assert antes.startswith('/static/css/app.css?v=')
+    assert depois.startswith('/static/css/app.css?v=')
+    assert antes != depois
+
+def test_url_versionada_recebe_cache_imutavel(client, pasta_estatica):
+    resposta = client.get('/static/img/logo.svg?v=abc123')
+    
+    assert resposta.cache_control.max_age == 31536000
+    assert resposta.cache_control.immutable
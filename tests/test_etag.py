@@ -0,0 +1,88 @@
+from datetime import date
+
+import pytest
+
+from app import db, Paciente, PAGINAS_COM_ETAG
+
+PAGINAS = {
+    'pacientes_cadastrar': '/pacientes/cadastrar',
+    'veiculos_cadastrar': '/veiculos/cadastrar',
+    'motoristas_cadastrar': '/motoristas/cadastrar',
+    'agendamentos_novo': '/agendamentos/novo',
+    'motoristas': '/motoristas',
+    'agendamentos': '/agendamentos',
+}
+
+def test_todas_as_paginas_com_etag_estao_cobertas():
+    assert set(PAGINAS) == PAGINAS_COM_ETAG
+
+@pytest.mark.parametrize('caminho', PAGINAS.values())
+def test_pagina_responde_304_com_o_mesmo_etag(cliente_logado, caminho):
+    # Consome o flash "Login realizado" (o formulário que o exibe tem outro HTML e outro ETag)
+    cliente_logado.get('/pacientes/cadastrar')
+    resposta = cliente_logado.get(caminho)
+    
+    assert resposta.status_code == 200
+    assert resposta.headers['ETag']
+    assert resposta.cache_control.private and resposta.cache_control.no_cache
+    
+    repetida = cliente_logado.get(caminho, headers={'If-None-Match': resposta.headers['ETag']})
+    
+    assert repetida.status_code == 304
+    assert repetida.get_data() == b''
+
+def test_etag_muda_quando_a_pagina_muda(cliente_logado):
+    cliente_logado.get('/pacientes/cadastrar')
+    antes = cliente_logado.get('/motoristas').headers['ETag']
+    cliente_logado.post('/motoristas/cadastrar', data={
+        'nome': 'Motorista Novo', 'cpf': '444.444.444-44', 'telefone': '(19) 95555-0000',
+        'data_nascimento': '1980-01-01', 'cnh': '12345678900', 'categoria_cnh': 'D',
+        'vencimento_cnh': '2030-01-01', 'status': 'ativo',
+    })
+    
+    resposta = cliente_logado.get('/motoristas', headers={'If-None-Match': antes})
+    
+    assert resposta.status_code == 200
+    assert resposta.headers['ETag'] != antes
+    assert 'Motorista Novo' in resposta.get_data(as_text=True)
+
+def test_post_nao_recebe_etag(cliente_logado):
+    resposta = cliente_logado.post('/motoristas/cadastrar', data={})
+    
+    assert 'ETag' not in resposta.headers
+
+def test_dashboard_em_streaming_nao_recebe_etag(cliente_logado):
+    resposta = cliente_logado.get('/dashboard')
+    
+    assert resposta.is_streamed
+    assert 'ETag' not in resposta.headers
+
+def test_dashboard_api_responde_304_enquanto_os_dados_nao_mudam(cliente_logado):
+    resposta = cliente_logado.get('/dashboard_api')
+    etag = resposta.headers['ETag']
+    
+    assert resposta.status_code == 200
+    assert etag.startswith('W/')
+    assert resposta.cache_control.private
+    assert resposta.cache_control.max_age == 30
+    
+    repetida = cliente_logado.get('/dashboard_api', headers={'If-None-Match': etag})
+    
+    assert repetida.status_code == 304
+    assert repetida.get_data() == b''
+    assert repetida.headers['ETag'] == etag
+
+def test_dashboard_api_muda_o_etag_apos_um_commit(app, cliente_logado):
+    etag = cliente_logado.get('/dashboard_api').headers['ETag']
+    with app.app_context():
+        db.session.add(Paciente(
+            nome='Paciente Novo', cpf='555.555.555-55', telefone='(19) 94444-0000',
+            data_nascimento=date(1990, 1, 1), endereco='Rua B, 2',
+        ))
+        db.session.commit()
+    
+    resposta = cliente_logado.get('/dashboard_api', headers={'If-None-Match': etag})
+    
+    assert resposta.status_code == 200
+    assert resposta.headers['ETag'] != etag
+    assert resposta.get_json()['stats']['pacientes_ativos'] == 1
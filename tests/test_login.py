@@ -0,0 +1,100 @@
+import bcrypt
+from werkzeug.security import generate_password_hash
+
+from app import db, BCRYPT_ROUNDS, _DUMMY_HASH, buscar_usuario_por_username
+from conftest import fazer_login
+
+def hash_do_admin(app):
+    with app.app_context():
+        return buscar_usuario_por_username('admin').password_hash
+
+def definir_hash_do_admin(app, password_hash):
+    with app.app_context():
+        buscar_usuario_por_username('admin').password_hash = password_hash
+        db.session.commit()
+
+def test_login_valido_redireciona_para_o_dashboard(client):
+    resposta = fazer_login(client)
+    
+    assert resposta.status_code == 302
+    assert resposta.headers['Location'].endswith('/dashboard')
+    with client.session_transaction() as sessao:
+        assert sessao['_user_id'] == '1'
+
+def test_senha_incorreta(client):
+    resposta = fazer_login(client, password='errada')
+    
+    assert resposta.status_code == 200
+    assert 'Usuário ou senha inválidos!' in resposta.get_data(as_text=True)
+    with client.session_transaction() as sessao:
+        assert '_user_id' not in sessao
+
+def test_usuario_inexistente_paga_uma_verificacao_bcrypt(client, monkeypatch):
+    verificados = []
+    checkpw = bcrypt.checkpw
+    
+    def registrar(senha, hash_senha):
+        verificados.append(hash_senha)
+        return checkpw(senha, hash_senha)
+    
+    monkeypatch.setattr(bcrypt, 'checkpw', registrar)
+    resposta = fazer_login(client, username='ninguem', password='qualquer')
+    
+    assert resposta.status_code == 200
+    # Mesma mensagem do usuário existente com senha errada: a resposta não revela se o username existe
+    assert 'Usuário ou senha inválidos!' in resposta.get_data(as_text=True)
+    assert verificados == [_DUMMY_HASH]
+
+def test_hash_descartavel_tem_o_custo_de_bcrypt_rounds():
+    assert int(_DUMMY_HASH.split(b'$')[2]) == BCRYPT_ROUNDS
+    assert bcrypt.checkpw(b'admin123', _DUMMY_HASH) is False
+
+def test_hash_legado_do_werkzeug_e_regravado_em_bcrypt(app, client):
+    definir_hash_do_admin(app, generate_password_hash('admin123', method='pbkdf2:sha256:1000'))
+    
+    assert fazer_login(client).status_code == 302
+    
+    novo_hash = hash_do_admin(app)
+    assert novo_hash.startswith(f'$2b${BCRYPT_ROUNDS}$')
+    assert bcrypt.checkpw(b'admin123', novo_hash.encode('utf-8'))
+
+def test_hash_bcrypt_com_custo_antigo_e_regravado(app, client):
+    definir_hash_do_admin(app, bcrypt.hashpw(b'admin123', bcrypt.gensalt(rounds=4)).decode('utf-8'))
+    
+    assert fazer_login(client).status_code == 302
+    
+    assert hash_do_admin(app).startswith(f'$2b${BCRYPT_ROUNDS}$')
+
+def test_senha_incorreta_nao_regrava_o_hash(app, client):
+    legado = generate_password_hash('admin123', method='pbkdf2:sha256:1000')
+    definir_hash_do_admin(app, legado)
+    
+    fazer_login(client, password='errada')
+    
+    assert hash_do_admin(app) == legado
+
+def test_falha_ao_regravar_o_hash_nao_impede_o_login(app, monkeypatch):
+    legado = generate_password_hash('admin123', method='pbkdf2:sha256:1000')
+    definir_hash_do_admin(app, legado)
+    
+    def commit_falha():
+        raise RuntimeError('database is locked')
+    
+    with app.app_context():
+        admin = buscar_usuario_por_username('admin')
+        monkeypatch.setattr(db.session, 'commit', commit_falha)
+        
+        assert admin.check_password('admin123') is True
+        
+        monkeypatch.undo()
+        db.session.expire_all()
+        assert buscar_usuario_por_username('admin').password_hash == legado
+
+def test_login_limitado_a_10_tentativas_por_minuto(client):
+    # Campos vazios: a view responde sem bcrypt, mas a tentativa conta no limite
+    for _ in range(10):
+        assert client.post('/login', data={}).status_code == 302
+    
+    assert client.post('/login', data={}).status_code == 429
+    # O GET da tela de login não entra no limite
+    assert client.get('/login').status_code == 200
@@ -0,0 +1,90 @@
+import pytest
+
+import app as aplicacao
+from app import db, Usuario, get_user_by_id, invalidar_cache_usuario, load_user
+from conftest import contar_consultas
+
+def test_get_user_by_id_consulta_o_banco_uma_vez(app):
+    with app.app_context(), contar_consultas(db.engine) as consultas:
+        primeiro = get_user_by_id(1)
+        segundo = get_user_by_id(1)
+    
+    assert primeiro == segundo
+    assert primeiro['username'] == 'admin'
+    # Só as colunas do current_user: o hash da senha não vai para o cache
+    assert 'password_hash' not in primeiro
+    assert len(consultas) == 1
+
+def test_usuario_inexistente_tambem_fica_em_cache(app):
+    with app.app_context(), contar_consultas(db.engine) as consultas:
+        assert get_user_by_id(999) is None
+        assert get_user_by_id(999) is None
+    
+    assert len(consultas) == 1
+
+def test_invalidar_cache_usuario_busca_de_novo(app):
+    with app.app_context():
+        get_user_by_id(1)
+        db.session.get(Usuario, 1).nome_completo = 'Novo Nome'
+        db.session.commit()
+        assert get_user_by_id(1)['nome_completo'] == 'Administrador do Sistema'
+        
+        invalidar_cache_usuario(1)
+        
+        assert get_user_by_id(1)['nome_completo'] == 'Novo Nome'
+
+def test_load_user_monta_usuario_desacoplado_da_sessao(app):
+    with app.test_request_context():
+        usuario = load_user('1')
+        
+        assert isinstance(usuario, Usuario)
+        assert db.inspect(usuario).transient
+        assert usuario not in db.session
+        assert (usuario.username, usuario.tipo_usuario, usuario.ativo) == ('admin', 'administrador', True)
+        assert usuario.password_hash is None
+        assert usuario.is_authenticated and usuario.is_active
+        assert usuario.get_id() == '1'
+        # Mesma requisição: o mesmo objeto, sem passar de novo pelo cache
+        assert load_user('1') is usuario
+
+def test_load_user_reaproveita_o_cache_entre_requisicoes(app):
+    with app.test_request_context():
+        load_user('1')
+    
+    with app.test_request_context(), contar_consultas(db.engine) as consultas:
+        assert load_user('1').username == 'admin'
+    
+    assert consultas == []
+
+@pytest.mark.parametrize('user_id', ['abc', '', None])
+def test_load_user_com_id_invalido(app, user_id):
+    with app.test_request_context():
+        assert load_user(user_id) is None
+
+def test_load_user_nao_engole_erros_do_cache(app, monkeypatch):
+    def cache_fora_do_ar(user_id):
+        raise ConnectionError('cache indisponível')
+    
+    monkeypatch.setattr(aplicacao, 'get_user_by_id', cache_fora_do_ar)
+    with app.test_request_context(), pytest.raises(ConnectionError):
+        load_user('1')
+
+def test_sessao_de_usuario_removido_volta_para_o_login(client):
+    with client.session_transaction() as sessao:
+        sessao['_user_id'] = '999'
+        sessao['_fresh'] = True
+    
+    resposta = client.get('/dashboard')
+    
+    assert resposta.status_code == 302
+    assert '/login' in resposta.headers['Location']
+
+def test_paginas_usam_o_usuario_do_cache(app, cliente_logado):
+    cliente_logado.get('/pacientes/cadastrar')
+    
+    with app.app_context(), contar_consultas(db.engine) as consultas:
+        resposta = cliente_logado.get('/pacientes/cadastrar')
+    
+    assert resposta.status_code == 200
+    assert 'Administrador do Sistema' in resposta.get_data(as_text=True)
+    assert not any('FROM usuarios' in consulta for consulta in consultas)
@@ -75,9 +75,9 @@ def atualizar_usuarios():
             if cursor.fetchone()[0] == 0:
                 # Importar aqui para evitar problemas de contexto
                 try:
-                    from werkzeug.security import generate_password_hash
+                    import bcrypt
                     
-                    supervisor_hash = generate_password_hash('supervisor123')
+                    supervisor_hash = bcrypt.hashpw(b'supervisor123', bcrypt.gensalt(rounds=12)).decode('utf-8')
                     now = datetime.now().isoformat()
                     
                     cursor.execute("""